@@ -0,0 +1,266 @@
+"""Suite de benchmarks du ML Engine (inférence + entraînement) avec suivi des régressions.
+
+Groupes mesurés sur la version active du registre :
+
+* ``vectorize`` : débit de ``vectorizer.transform`` par longueur de description
+  et taille de lot ;
+* ``predict``   : latence par description, appel unitaire ou par lot ;
+* ``proba``     : ``predict`` + ``predict_proba`` (deux passages dans la forêt)
+  face à un seul ``predict_proba`` + argmax (chemin de app.py) ;
+* ``http``      : /predict et /predict_batch de bout en bout via le client de
+  test Flask (cache de prédictions désactivé) ;
+* ``train``     : ``fit`` du TF-IDF et de la Random Forest sur le corpus.
+
+Chaque cas est répété plusieurs fois ; le JSON garde la médiane et le p95
+en microsecondes par description, plus les versions des bibliothèques.
+
+Usage :
+    python benchmarks/bench_ml_engine.py run [--output resultats.json] [--groups predict,http] [--quick]
+    python benchmarks/bench_ml_engine.py compare baseline.json resultats.json [--threshold 0.15]
+
+``compare`` affiche l'écart de chaque cas et sort en erreur (code 1) si un
+cas est plus lent que la référence au-delà du seuil.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_ENGINE = os.path.join(ROOT, 'ml_engine')
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results', 'ml_engine.json')
+GROUPS = ('vectorize', 'predict', 'proba', 'http', 'train')
+
+# Longueurs de description (mots) et tailles de lot balayées
+LENGTHS = (5, 20, 100, 500)
+BATCH_SIZES = (1, 10, 100, 1000)
+
+
+# ========== OUTILS DE MESURE ==========
+def measure(func, items, min_time, max_repeat):
+    """Répète ``func`` ; renvoie médiane et p95 en µs par élément traité."""
+    func()  # Échauffement (caches, imports paresseux)
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_repeat and (len(samples) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) / items * 1e6)
+    samples.sort()
+    return {
+        'median_us': round(statistics.median(samples), 3),
+        'p95_us': round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+        'repeat': len(samples),
+        'items': items,
+    }
+
+
+def build_descriptions(corpus, words, count, seed=42):
+    """Descriptions d'environ ``words`` mots, assemblées à partir du corpus réel."""
+    rng = random.Random(seed + words)
+    descriptions = []
+    for _ in range(count):
+        tokens = []
+        while len(tokens) < words:
+            tokens.extend(rng.choice(corpus).split())
+        descriptions.append(' '.join(tokens[:words]))
+    return descriptions
+
+
+# ========== GROUPES ==========
+def bench_vectorize(bundle, corpus, args):
+    results = {}
+    for words in LENGTHS:
+        for size in BATCH_SIZES:
+            texts = build_descriptions(corpus, words, size)
+            results[f'vectorize/words={words}/batch={size}'] = measure(
+                lambda: bundle.vectorizer.transform(texts), size, args.min_time, args.max_repeat)
+    return results
+
+
+def bench_predict(bundle, corpus, args):
+    results = {}
+    for words in LENGTHS:
+        texts = build_descriptions(corpus, words, max(BATCH_SIZES))
+        for size in BATCH_SIZES:
+            batch = texts[:size]
+            results[f'predict/words={words}/batch={size}'] = measure(
+                lambda: bundle.model.predict_proba(bundle.vectorizer.transform(batch)),
+                size, args.min_time, args.max_repeat)
+    return results
+
+
+def bench_proba(bundle, corpus, args):
+    results = {}
+    texts = build_descriptions(corpus, 20, max(BATCH_SIZES))
+    for size in BATCH_SIZES:
+        X = bundle.vectorizer.transform(texts[:size])
+
+        def two_passes():
+            bundle.model.predict(X)
+            bundle.model.predict_proba(X)
+
+        def single_pass():
+            bundle.model.classes_[bundle.model.predict_proba(X).argmax(axis=1)]
+
+        results[f'proba/predict+predict_proba/batch={size}'] = measure(
+            two_passes, size, args.min_time, args.max_repeat)
+        results[f'proba/predict_proba+argmax/batch={size}'] = measure(
+            single_pass, size, args.min_time, args.max_repeat)
+    return results
+
+
+def bench_http(bundle, corpus, args):
+    from app import create_app
+
+    client = create_app().test_client()
+    results = {}
+    for words in LENGTHS:
+        texts = build_descriptions(corpus, words, max(BATCH_SIZES))
+        results[f'http/predict/words={words}'] = measure(
+            lambda: client.post('/predict', json={'description': texts[0]}), 1, args.min_time, args.max_repeat)
+        for size in BATCH_SIZES[1:]:
+            payload = {'descriptions': texts[:size]}
+            results[f'http/predict_batch/words={words}/batch={size}'] = measure(
+                lambda: client.post('/predict_batch', json=payload), size, args.min_time, args.max_repeat)
+    return results
+
+
+def bench_train(bundle, corpus, args):
+    import pandas as pd
+    from sklearn.base import clone
+
+    df = pd.read_csv(os.path.join(ML_ENGINE, 'training_data.csv'))
+    X = clone(bundle.vectorizer).fit_transform(df['description'])
+    results = {
+        'train/tfidf_fit': measure(lambda: clone(bundle.vectorizer).fit_transform(df['description']),
+                                   len(df), args.min_time, 3),
+    }
+    if hasattr(bundle.model, 'estimators_'):
+        model = clone(bundle.model).set_params(n_jobs=-1)
+        results['train/forest_fit'] = measure(lambda: model.fit(X, df['category']), len(df), args.min_time, 3)
+    return results
+
+
+# ========== COMMANDES ==========
+def run(args):
+    # Prédictions toujours recalculées, pas de surveillance de CURRENT pendant la mesure
+    os.environ['ML_CACHE_MAX_ENTRIES'] = '0'
+    os.environ['ML_MODEL_WATCH_INTERVAL'] = '0'
+    os.environ['ML_MODEL_FORMAT'] = args.model_format
+    output = os.path.abspath(args.output)
+    sys.path.insert(0, ML_ENGINE)
+    os.chdir(ML_ENGINE)
+
+    import numpy as np
+    import pandas as pd
+    from model_registry import ModelRegistry
+
+    bundle = ModelRegistry(model_format=args.model_format).load()
+    if bundle is None:
+        raise SystemExit("❌ ERREUR : Modèle non trouvé ! Exécutez train_model.py d'abord.")
+    corpus = pd.read_csv('training_data.csv')['description'].dropna().tolist()
+
+    groups = args.groups.split(',') if args.groups else list(GROUPS)
+    if args.model_format == 'npz' and 'train' in groups:
+        groups.remove('train')  # Rien à entraîner sans les objets scikit-learn
+
+    results = {}
+    for group in groups:
+        print(f"⏱️  {group}...")
+        group_results = globals()[f'bench_{group}'](bundle, corpus, args)
+        for name, result in group_results.items():
+            print(f"   {name:<48} {result['median_us']:>12.1f} µs/élément (p95 {result['p95_us']:.1f})")
+        results.update(group_results)
+
+    try:
+        import sklearn
+        sklearn_version = sklearn.__version__
+    except ImportError:
+        sklearn_version = None
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'model_version': bundle.version,
+            'model_format': args.model_format,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scikit_learn': sklearn_version,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📦 Résultats : {output}")
+
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    if baseline['meta'].get('machine') != current['meta'].get('machine') or \
+            baseline['meta'].get('cpu_count') != current['meta'].get('cpu_count'):
+        print("⚠️  Référence mesurée sur une autre machine : écarts à interpréter avec prudence")
+
+    regressions = []
+    print(f"{'cas':<48} | {'référence (µs)':>14} | {'actuel (µs)':>12} | {'écart':>7}")
+    print("-" * 92)
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f"{name:<48} | {'-':>14} | {result['median_us']:>12.1f} | {'nouveau':>7}")
+            continue
+        delta = result['median_us'] / reference['median_us'] - 1
+        flag = ''
+        if delta > args.threshold:
+            flag = '  ❌ régression'
+            regressions.append(name)
+        print(f"{name:<48} | {reference['median_us']:>14.1f} | {result['median_us']:>12.1f} | {delta:>+7.0%}{flag}")
+
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"ℹ️  {len(missing)} cas de la référence non mesurés (groupes non exécutés ?)")
+    if regressions:
+        raise SystemExit(f"❌ {len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+    print(f"✅ Aucune régression au-delà de {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Exécuter les benchmarks et écrire le JSON")
+    run_parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    run_parser.add_argument('--groups', help=f"Sous-ensemble de {','.join(GROUPS)}")
+    run_parser.add_argument('--model-format', choices=('joblib', 'npz'), default='joblib')
+    run_parser.add_argument('--min-time', type=float, default=0.5, help="Durée minimale de mesure par cas (s)")
+    run_parser.add_argument('--max-repeat', type=int, default=200)
+    run_parser.add_argument('--quick', action='store_true', help="Mesures courtes (vérification rapide)")
+
+    compare_parser = subparsers.add_parser('compare', help="Comparer des résultats à une référence")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help="Ralentissement toléré de la médiane (0.15 = +15 %%)")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        if args.quick:
+            args.min_time, args.max_repeat = 0.05, 10
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark du format d'inférence léger (npz) face au modèle joblib.
+
+Pour chaque format, un processus neuf mesure :
+
+* le démarrage du service : ``import app`` + ``create_app()`` (Flask,
+  métriques, registre, chargement de la version active), c'est-à-dire ce
+  que paie un worker Gunicorn à froid ;
+* le pic de mémoire résident (RSS) après chargement ;
+* la latence d'une prédiction unitaire (vectorisation + predict_proba)
+  et d'un lot de 1000 descriptions.
+
+Prérequis : un modèle publié avec l'export npz (python train_model.py).
+
+Usage : python benchmarks/bench_npz_inference.py [--requests 300] [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_ENGINE = os.path.join(ROOT, 'ml_engine')
+
+# Exécuté dans un processus neuf : le démarrage mesuré part d'un interpréteur vide
+CHILD = r'''
+import os, resource, sys, time
+os.environ['ML_MODEL_FORMAT'] = sys.argv[1]
+start = time.perf_counter()
+import app
+app.create_app()
+startup = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+bundle = app.registry.current
+# Relevé avant la lecture du corpus ci-dessous (qui importe pandas)
+sklearn_imported = any(m.startswith('sklearn') for m in sys.modules)
+pandas_imported = 'pandas' in sys.modules
+
+import json
+import pandas as pd
+corpus = pd.read_csv('training_data.csv')['description'].tolist()
+
+def predict(texts):
+    proba = bundle.model.predict_proba(bundle.vectorizer.transform(texts))
+    return bundle.model.classes_[proba.argmax(axis=1)]
+
+latencies = []
+for text in corpus[:int(sys.argv[2])]:
+    t = time.perf_counter()
+    predict([text])
+    latencies.append(time.perf_counter() - t)
+latencies.sort()
+
+batch = (corpus * 2)[:1000]
+t = time.perf_counter()
+predict(batch)
+batch_s = time.perf_counter() - t
+
+print(json.dumps({
+    'startup_ms': startup * 1000,
+    'rss_mb': rss,
+    'sklearn_imported': sklearn_imported,
+    'pandas_imported': pandas_imported,
+    'p50_ms': latencies[len(latencies) // 2] * 1000,
+    'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    'batch_1000_ms': batch_s * 1000,
+}))
+'''
+
+
+def run(model_format, requests):
+    output = subprocess.run([sys.executable, '-c', CHILD, model_format, str(requests)],
+                            cwd=ML_ENGINE, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300, help="Prédictions unitaires par processus")
+    parser.add_argument('--runs', type=int, default=3, help="Processus par format (médiane)")
+    args = parser.parse_args()
+
+    print(f"{'format':>7} | {'démarrage (ms)':>14} | {'RSS (Mo)':>8} | {'sklearn':>7} | {'pandas':>6} | "
+          f"{'p50 (ms)':>8} | {'p99 (ms)':>8} | {'lot 1000 (ms)':>13}")
+    print("-" * 96)
+    for model_format in ('joblib', 'npz'):
+        runs = [run(model_format, args.requests) for _ in range(args.runs)]
+        median = {key: statistics.median(r[key] for r in runs) for key in runs[0] if not key.endswith('_imported')}
+        print(f"{model_format:>7} | {median['startup_ms']:>14.0f} | {median['rss_mb']:>8.0f} | "
+              f"{'oui' if runs[0]['sklearn_imported'] else 'non':>7} | "
+              f"{'oui' if runs[0]['pandas_imported'] else 'non':>6} | {median['p50_ms']:>8.2f} | "
+              f"{median['p99_ms']:>8.2f} | {median['batch_1000_ms']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Micro-benchmark du moteur de règles de sécurité (Couche 1 : Regex).
+
+Compare l'ancienne boucle ``any(re.search(p, text) ...)`` (listes reconstruites
+à chaque appel, comme dans l'onchange d'origine) au moteur compilé
+``tools/safety_rules.py``, et vérifie que les deux donnent la même
+priorité et le même risque bio.
+
+Usage : python benchmarks/bench_safety_rules.py [--repeat 2000]
+"""
+import argparse
+import importlib
+import os
+import random
+import re
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(ROOT, 'extra-addons', 'biomed_maintenance', 'tools')
+
+# Paquet minimal autour de tools/ : safety_rules importe text_normalizer (import relatif),
+# aucun des deux n'importe Odoo
+package = types.ModuleType('biomed_tools')
+package.__path__ = [TOOLS_DIR]
+sys.modules['biomed_tools'] = package
+safety_rules = importlib.import_module('biomed_tools.safety_rules')
+
+
+def legacy_triage(text):
+    critical_patterns = [r'fumée', r'feu\b', r'étincelle', r'brûlé', r'explosion', r'choc', r'court-circuit']
+    high_patterns = [r'panne', r'bloqué', r'erreur', r'anomalie', r'dysfonctionnement', r'cassé', r'ne démarre plus']
+    bio_patterns = [r'sang', r'virus', r'bactérie', r'fluide', r'contamin', r'covid', r'exposition']
+
+    priority = '1'
+    if any(re.search(p, text) for p in critical_patterns):
+        priority = '3'
+    elif any(re.search(p, text) for p in high_patterns):
+        priority = '2'
+    return priority, any(re.search(p, text) for p in bio_patterns)
+
+
+def engine_triage(text):
+    matches = safety_rules.ENGINE.scan(text)
+    priority = '1'
+    if safety_rules.TIER_CRITICAL in matches:
+        priority = '3'
+    elif safety_rules.TIER_HIGH in matches:
+        priority = '2'
+    return priority, safety_rules.TIER_BIO in matches
+
+
+FILLER = (
+    "Intervention sur le moniteur du bloc opératoire, le technicien a vérifié "
+    "l'alimentation, les connecteurs et le câblage sans trouver de cause évidente. "
+)
+KEYWORDS = ["fumée", "feu", "panne", "sang", "covid", "erreur", "court-circuit", "fluide", "feutre", ""]
+
+
+def build_corpus(size, words, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        text = FILLER * max(1, words // 20)
+        position = rng.randrange(len(text))
+        text = text[:position] + f" {rng.choice(KEYWORDS)} " + text[position:]
+        corpus.append(text.lower())
+    return corpus
+
+
+def timed(func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'mots':>6} | {'ancien (µs)':>12} | {'moteur (µs)':>12} | {'gain':>6}")
+    print("-" * 46)
+    for words in (20, 100, 500, 2000):
+        corpus = build_corpus(50, words)
+        mismatches = [t for t in corpus if legacy_triage(t) != engine_triage(t)]
+        assert not mismatches, f"Résultats différents sur {len(mismatches)} descriptions"
+
+        legacy = timed(legacy_triage, corpus, args.repeat)
+        engine = timed(engine_triage, corpus, args.repeat)
+        print(f"{words:>6} | {legacy * 1e6:>12.1f} | {engine * 1e6:>12.1f} | {legacy / engine:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark du planificateur de techniciens (tools/scheduler.py).
+
+Génère un carnet de N ordres confirmés (10 000 par défaut) et T techniciens
+(200 par défaut) aux compétences, habilitations EPI et capacités variées,
+mesure le temps d'affectation et vérifie les contraintes :
+
+* un ordre à risque bio n'est confié qu'à un technicien habilité EPI ;
+* un ordre classé n'est confié qu'à un technicien compétent dans sa catégorie ;
+* les urgences sont planifiées avant les priorités plus basses du même technicien ;
+* un ordre tient dans la journée de son technicien (8 h + capacité) et ne
+  chevauche pas l'ordre précédent du même technicien ;
+* avec ``--horizon``, aucun créneau ne dépasse l'horizon, et un ordre n'est
+  laissé sans technicien que si aucun technicien éligible n'avait de place.
+
+Usage : python benchmarks/bench_scheduler.py [--orders 10000] [--technicians 200] [--horizon 30]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEDULER_PATH = os.path.join(ROOT, 'extra-addons', 'biomed_maintenance', 'tools', 'scheduler.py')
+
+# Chargement direct du fichier : le module n'importe pas Odoo
+spec = importlib.util.spec_from_file_location('scheduler', SCHEDULER_PATH)
+scheduler = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(scheduler)
+
+CATEGORIES = ['Electronique', 'Optique', 'Software', 'Hydraulique']  # CATEGORY_SELECTION
+
+
+def build_dataset(n_orders, n_technicians, seed=42):
+    rng = random.Random(seed)
+    technicians = []
+    for tech_id in range(1, n_technicians + 1):
+        skills = {c: rng.randint(1, 3) for c in rng.sample(CATEGORIES, rng.randint(1, 2))}
+        technicians.append(scheduler.Technician(
+            tech_id, skills, rng.random() < 0.3, rng.choice([4.0, 6.0, 8.0, 8.0]), rng.uniform(0, 16)))
+    orders = [scheduler.Order(
+        order_id,
+        rng.choice(CATEGORIES + [False]),
+        rng.choice('0112223'),
+        rng.random() < 0.1,
+        rng.choice([0.5, 1.0, 2.0, 3.0, 4.0]),
+    ) for order_id in range(1, n_orders + 1)]
+    return technicians, orders
+
+
+def check(technicians, orders, assignments, horizon=None):
+    techs = {t.id: t for t in technicians}
+    by_id = {o.id: o for o in orders}
+    errors = 0
+    last_priority, last_end = {}, {}
+    for assignment in assignments:  # Dans l'ordre de traitement
+        order, tech = by_id[assignment.order_id], techs[assignment.technician_id]
+        begin = assignment.date_scheduled
+        if order.bio_hazard and not tech.ppe_qualified:
+            errors += 1
+        if order.category and order.category not in tech.skills:
+            errors += 1
+        if int(order.priority) > last_priority.get(tech.id, 9):
+            errors += 1
+        last_priority[tech.id] = int(order.priority)
+        day_start = begin.replace(hour=scheduler.WORKDAY_START_HOUR, minute=0, second=0, microsecond=0)
+        if begin.weekday() >= 5 or begin < day_start:
+            errors += 1
+        if order.duration <= tech.capacity and begin + timedelta(hours=order.duration) > \
+                day_start + timedelta(hours=tech.capacity):
+            errors += 1  # Déborde sur la fin de journée
+        if begin < last_end.get(tech.id, begin):
+            errors += 1  # Chevauche l'ordre précédent
+        last_end[tech.id] = begin + timedelta(hours=order.duration)
+        if horizon and begin > horizon:
+            errors += 1
+    return errors
+
+
+def check_unassigned(technicians, orders, unassigned, planner):
+    """Un ordre non affecté ne doit avoir aucun technicien éligible capable de le placer dans l'horizon."""
+    by_id = {o.id: o for o in orders}
+    errors = 0
+    for order_id in unassigned:
+        order = by_id[order_id]
+        for tech in technicians:
+            if tech.id not in planner.cursor or (order.bio_hazard and not tech.ppe_qualified):
+                continue
+            if order.category and order.category not in tech.skills:
+                continue
+            begin, _cursor = scheduler.place(planner.cursor[tech.id], order.duration, tech.capacity)
+            if begin <= planner.horizon:
+                errors += 1
+                break
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--technicians', type=int, default=200)
+    parser.add_argument('--horizon', type=int, default=None, help="Horizon de planification (jours)")
+    args = parser.parse_args()
+
+    technicians, orders = build_dataset(args.orders, args.technicians)
+    start = datetime(2025, 1, 6, 9, 30)  # Un lundi matin : résultat reproductible
+
+    t0 = time.perf_counter()
+    planner = scheduler.Scheduler(technicians, start=start, horizon_days=args.horizon)
+    assignments, unassigned = planner.assign(orders)
+    elapsed = time.perf_counter() - t0
+
+    errors = check(technicians, orders, assignments, planner.horizon)
+    if planner.horizon:
+        errors += check_unassigned(technicians, orders, unassigned, planner)
+    loads = Counter(a.technician_id for a in assignments)
+    last_date = max(a.date_scheduled for a in assignments)
+    print(f"{len(orders)} ordres, {len(technicians)} techniciens : {elapsed * 1000:.0f} ms "
+          f"({len(orders) / elapsed:,.0f} ordres/s)")
+    print(f"  affectés      : {len(assignments)} ({len(unassigned)} sans technicien éligible"
+          f"{' ou hors horizon' if planner.horizon else ''})")
+    print(f"  ordres/tech.  : min {min(loads.values())}, max {max(loads.values())}")
+    print(f"  dernier créneau : {last_date:%Y-%m-%d %H:%M}")
+    print(f"  contraintes   : {'OK' if not errors else f'{errors} violation(s)'}")
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Benchmark de la normalisation du texte partagée (text_normalizer.py).
+
+Mesure, sur les descriptions du jeu d'entraînement :
+
+* le coût par description de ``fold`` (chemin onchange, avant les règles
+  Regex), de ``analyze`` à froid (caches vidés) et à chaud, et du balayage
+  complet des règles de sécurité ;
+* la taille du vocabulaire TF-IDF (unigrammes + bigrammes, ``min_df=2``,
+  sans plafond ``max_features``) avec l'ancienne analyse (minuscules +
+  stop words anglais) et avec ``text_normalizer`` ;
+* l'effet sur un corpus « saisie rapide » où une partie des descriptions est
+  tapée sans accents ou en majuscules : règles déclenchées et accuracy.
+
+Vérifie aussi que les deux exemplaires du module (ml_engine/ et
+tools/ de l'addon) sont identiques : le script sort en erreur sinon.
+
+Usage : python benchmarks/bench_text_normalizer.py [--noise 0.3] [--repeat 20]
+"""
+import argparse
+import filecmp
+import importlib
+import os
+import random
+import re
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_ENGINE = os.path.join(ROOT, 'ml_engine')
+TOOLS_DIR = os.path.join(ROOT, 'extra-addons', 'biomed_maintenance', 'tools')
+MODULE = 'text_normalizer.py'
+
+sys.path.insert(0, ML_ENGINE)
+import text_normalizer  # noqa: E402
+
+# Paquet minimal autour de tools/ : safety_rules importe text_normalizer (import relatif)
+package = types.ModuleType('biomed_tools')
+package.__path__ = [TOOLS_DIR]
+sys.modules['biomed_tools'] = package
+safety_rules = importlib.import_module('biomed_tools.safety_rules')
+
+
+def clear_caches():
+    text_normalizer.stem.cache_clear()
+    text_normalizer.tokenize.cache_clear()
+
+
+def per_description(func, corpus, repeat, setup=None):
+    """Meilleur temps sur ``repeat`` passages, en µs par description."""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+def add_noise(corpus, rate, seed=42):
+    """Saisie rapide : sans accents (2/3 des cas) ou tout en majuscules (1/3)."""
+    rng = random.Random(seed)
+    noisy = []
+    for text in corpus:
+        if rng.random() < rate:
+            text = text.upper() if rng.random() < 1 / 3 else text_normalizer.strip_accents(text)
+        noisy.append(text)
+    return noisy
+
+
+def canonical(term):
+    return ' '.join(text_normalizer.stem(text_normalizer.fold(word)) for word in term.split())
+
+
+# Ancien triage : motifs accentués appliqués à la description en minuscules
+LEGACY_RULES = [(tier, re.compile(pattern)) for tier, pattern in safety_rules.SAFETY_RULES]
+
+
+def legacy_scan(text):
+    text = text.lower()
+    return {tier for tier, regex in LEGACY_RULES if regex.search(text)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--noise', type=float, default=0.3, help="Part des descriptions tapées sans accents/en majuscules")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # 1. Les deux exemplaires doivent rester identiques
+    copies = [os.path.join(ML_ENGINE, MODULE), os.path.join(TOOLS_DIR, MODULE)]
+    if not filecmp.cmp(*copies, shallow=False):
+        sys.exit(f"❌ {copies[0]} et {copies[1]} ont divergé : recopiez le fichier modifié")
+    print(f"✅ Exemplaires identiques ({text_normalizer.NORMALIZER_VERSION})")
+
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(os.path.join(ML_ENGINE, 'training_data.csv'))
+    corpus = df['description'].tolist()
+    noisy = add_noise(corpus, args.noise)
+
+    # 2. Coût par description
+    print(f"\n⏱️  Coût par description ({len(corpus)} descriptions, {args.repeat} passages) :")
+    timings = [
+        ('str.lower (ancien)', lambda t: t.lower(), None),
+        ('fold', text_normalizer.fold, None),
+        ('analyze, cache froid', text_normalizer.analyze, clear_caches),
+        ('analyze, cache chaud', text_normalizer.analyze, None),
+        ('règles de sécurité (scan)', safety_rules.ENGINE.scan, None),
+    ]
+    for label, func, setup in timings:
+        print(f"   {label:<28} {per_description(func, noisy, args.repeat, setup):>7.2f} µs")
+
+    # 3. Taille du vocabulaire ; « variantes » = termes de l'ancienne analyse qui ne diffèrent
+    # d'un autre que par la casse, les accents ou la flexion (fusionnés par text_normalizer)
+    legacy_params = {'min_df': 2, 'stop_words': 'english'}
+    shared_params = {'min_df': 2, **text_normalizer.vectorizer_params()}
+    print("\n📚 Vocabulaire TF-IDF (min_df=2, sans plafond max_features) :")
+    print(f"   {'corpus':<22} {'n-grammes':>9} {'ancien':>7} {'variantes':>10} {'normalisé':>10} {'écart':>7}")
+    for label, texts in (("d'origine", corpus), (f'saisie rapide ({args.noise:.0%})', noisy)):
+        for ngram_range in ((1, 1), (1, 2)):
+            legacy = TfidfVectorizer(ngram_range=ngram_range, **legacy_params).fit(texts).vocabulary_
+            shared = TfidfVectorizer(ngram_range=ngram_range, **shared_params).fit(texts).vocabulary_
+            variants = len(legacy) - len({canonical(term) for term in legacy})
+            print(f"   {label:<22} {'%d-%d' % ngram_range:>9} {len(legacy):>7} {variants:>10} {len(shared):>10} "
+                  f"{len(shared) / len(legacy) - 1:>+7.0%}")
+    print("   (bigrammes : sans les mots vides, « le fusible il ne charge » donne « fusible ne », "
+          "nouvelle paire composant-symptôme)")
+
+    # 4. Saisie rapide : règles déclenchées et accuracy (plafond de 1000 features, comme train_model.py)
+    legacy_hits = sum(1 for text in noisy if legacy_scan(text))
+    shared_hits = sum(1 for text in noisy if safety_rules.ENGINE.scan(text))
+    reference_hits = sum(1 for text in corpus if safety_rules.ENGINE.scan(text))
+    print(f"\n🛡️  Règles déclenchées sur le corpus « saisie rapide » : ancien {legacy_hits}, "
+          f"normalisé {shared_hits} (texte d'origine : {reference_hits})")
+
+    X_train, X_test, y_train, y_test = train_test_split(noisy, df['category'], test_size=0.2,
+                                                        random_state=42, stratify=df['category'])
+    for label, params in (('ancien', legacy_params), ('normalisé', shared_params)):
+        vectorizer = TfidfVectorizer(max_features=1000, ngram_range=(1, 2), **params)
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+        model.fit(vectorizer.fit_transform(X_train), y_train)
+        accuracy = (model.predict(vectorizer.transform(X_test)) == y_test.to_numpy()).mean()
+        print(f"   accuracy {label:<10} {accuracy:.2%} ({len(vectorizer.vocabulary_)} features)")
+
+
+if __name__ == '__main__':
+    main()
@@ -45,9 +45,13 @@ Fonctionnalités Clés :
 
         # 2. DONNÉES TECHNIQUES : La séquence doit exister avant d'être utilisée
         'data/maintenance_sequence.xml',
+        'data/maintenance_actions.xml',
 
         # 3. INTERFACE UTILISATEUR (VUES) : Charge les menus et formulaires
         'views/maintenance_order_views.xml',
+        'views/ml_triage_job_views.xml',
+        'views/maintenance_report_views.xml',
+        'views/res_users_views.xml',
         'views/maintenance_menu.xml',
     ],
 
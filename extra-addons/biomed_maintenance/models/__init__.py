@@ -1 +1,4 @@
-from . import maintenance_order
\ No newline at end of file
+from . import maintenance_order
+from . import ml_triage_job
+from . import maintenance_report
+from . import res_users
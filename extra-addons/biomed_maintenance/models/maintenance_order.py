@@ -1,12 +1,37 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
-import re
-import requests
+from collections import defaultdict
 import logging
+import pytz
+
+from ..tools import safety_rules, scheduler
+from ..tools.ml_client import CLIENT as ML_CLIENT
 
 _logger = logging.getLogger(__name__)
 
+# ========== CONFIGURATION ML ENGINE ==========
+ML_MIN_DESCRIPTION_LENGTH = 15  # En dessous, la description est trop courte pour le ML
+ML_BATCH_SIZE = 500             # Réduit automatiquement au max_batch_size du serveur (réponse 413)
+ML_TRIAGE_MODE_PARAM = 'biomed_maintenance.ml_triage_mode'
+ML_FEEDBACK_HWM_PARAM = 'biomed_maintenance.ml_feedback_hwm'
+# Contexte d'import de masse (flux GMAO) : pas de suivi Chatter par enregistrement
+BULK_IMPORT_CONTEXT = 'biomed_bulk_import'
+SEQUENCE_CODE = 'biomed.maintenance.order'
+
+# Horizon de planification : au-delà, l'ordre reste non assigné (capacité insuffisante)
+SCHEDULER_HORIZON_DAYS = 30
+
+# États « ouverts » : prédicat de l'index partiel du tableau de bord (filtre « Ouverts »)
+OPEN_STATES = ('draft', 'confirmed', 'in_progress')
+
+CATEGORY_SELECTION = [
+    ('Electronique', 'Électronique'),
+    ('Optique', 'Optique'),
+    ('Software', 'Logiciel'),
+    ('Hydraulique', 'Hydraulique')
+]
+
 class BiomedMaintenanceOrder(models.Model):
     _name = 'biomed.maintenance.order'
     _description = 'Ordre de Maintenance Biomédical'
@@ -23,7 +48,7 @@ class BiomedMaintenanceOrder(models.Model):
         ('in_progress', 'En cours'),
         ('done', 'Terminé'),
         ('cancelled', 'Annulé')
-    ], string='Statut', default='draft', tracking=True)
+    ], string='Statut', default='draft', tracking=True, index=True)
 
     # --- 2. LIAISON PARTIE 1 ---
     partner_id = fields.Many2one('res.partner', string='Client', required=True, tracking=True)
@@ -42,106 +67,194 @@ class BiomedMaintenanceOrder(models.Model):
     ai_analysis_log = fields.Text(string="Log IA", readonly=True)
     
     # ========== NOUVEAU CHAMP ML ==========
-    category = fields.Selection([
-        ('Electronique', 'Électronique'),
-        ('Optique', 'Optique'),
-        ('Software', 'Logiciel'),
-        ('Hydraulique', 'Hydraulique')
-    ], string='Catégorie Technique', tracking=True)
+    category = fields.Selection(CATEGORY_SELECTION, string='Catégorie Technique', tracking=True, index=True)
+    # Suggestion brute du ML : si le technicien corrige `category`, l'écart sert au réentraînement
+    ml_category = fields.Selection(CATEGORY_SELECTION, string='Catégorie suggérée (ML)', readonly=True, copy=False)
+    # Dernier passage du triage de masse : le cron ne reprend pas un ordre déjà tenté
+    # (description trop courte, ou que le ML n'a pas su classer)
+    ml_triage_date = fields.Datetime(string='Triage ML tenté le', readonly=True, copy=False)
 
     # --- 4. PLANIFICATION ---
-    technician_id = fields.Many2one('res.users', string='Technicien', tracking=True)
+    technician_id = fields.Many2one('res.users', string='Technicien', tracking=True, index='btree_not_null')
     date_scheduled = fields.Datetime(string='Date Prévue')
     duration = fields.Float(string='Durée (h)', default=1.0)
+    date_done = fields.Datetime(string='Clôturé le', readonly=True, copy=False, index=True)
     intervention_report = fields.Text(string="Rapport")
     part_ids = fields.One2many('biomed.maintenance.part', 'maintenance_id', string="Pièces")
 
+    # --- INDEX SQL ---
+    def init(self):
+        self._backfill_date_done()
+
+        # Index utilisés par _compute_origin_sale (jointure ligne -> commande confirmée la plus récente)
+        tools.create_index(self.env.cr, 'biomed_sale_order_line_product_order_idx',
+                           'sale_order_line', ['product_id', 'order_id'])
+        tools.create_index(self.env.cr, 'biomed_sale_order_partner_confirmed_date_idx',
+                           'sale_order', ['partner_id', 'date_order DESC', 'id DESC'],
+                           where="state IN ('sale', 'done')")
+
+        # Tri par défaut (_order) : la liste paginée lit l'index au lieu de trier toute la table
+        tools.create_index(self.env.cr, 'biomed_maintenance_order_priority_date_idx',
+                           self._table, ['priority DESC', 'date_scheduled'])
+        # Risque bio : rare, index partiel (petit) déjà trié comme la liste
+        tools.create_index(self.env.cr, 'biomed_maintenance_order_bio_hazard_idx',
+                           self._table, ['priority DESC', 'date_scheduled'], where='bio_hazard')
+        # Tableau de bord : index couvrant des ordres ouverts (agrégats sans lire la table)
+        open_states = ', '.join(f"'{state}'" for state in OPEN_STATES)
+        tools.create_index(self.env.cr, 'biomed_maintenance_order_open_dashboard_idx',
+                           self._table, ['category', 'priority', 'technician_id', 'duration'],
+                           where=f"state IN ({open_states})")
+        # File du cron de triage : ordres ouverts sans catégorie et jamais tentés
+        tools.create_index(self.env.cr, 'biomed_maintenance_order_ml_triage_todo_idx',
+                           self._table, ['id'],
+                           where="category IS NULL AND ml_triage_date IS NULL AND state NOT IN ('done', 'cancelled')")
+
+    def _backfill_date_done(self):
+        """Date de clôture des ordres terminés avant l'ajout de ``date_done``.
+
+        Sans elle, l'export du feedback (filtré sur ``date_done``) les ignore.
+        ``write_date`` est la meilleure approximation disponible. Si le point de
+        reprise de l'export est déjà plus récent, il est ramené à la plus ancienne
+        date reconstituée : quelques ordres déjà exportés peuvent être renvoyés,
+        aucun n'est perdu.
+        """
+        self.env.cr.execute(f"""
+            UPDATE {self._table}
+               SET date_done = COALESCE(write_date, create_date)
+             WHERE state = 'done' AND date_done IS NULL
+         RETURNING date_done
+        """)
+        backfilled = [row[0] for row in self.env.cr.fetchall() if row[0]]
+        if not backfilled:
+            return
+        oldest = fields.Datetime.to_string(min(backfilled))
+        ICP = self.env['ir.config_parameter'].sudo()
+        hwm_date = (ICP.get_param(ML_FEEDBACK_HWM_PARAM) or '').partition('|')[0]
+        if hwm_date and hwm_date >= oldest:
+            ICP.set_param(ML_FEEDBACK_HWM_PARAM, f"{oldest}|0")
+        _logger.info(f"date_done backfilled on {len(backfilled)} closed orders (oldest {oldest})")
+
     # --- LOGIQUE MÉTIER ---
     @api.depends('lot_id', 'partner_id')
     def _compute_origin_sale(self):
+        # Calcul ensembliste : une seule requête pour tous les couples (client, modèle)
+        # au lieu d'un sale.order.search par ordre de maintenance
+        pairs = {(record.partner_id.id, record.product_id.id)
+                 for record in self if record.partner_id and record.product_id}
+        latest_sale = {}
+        if pairs:
+            self.env['sale.order'].flush_model(['partner_id', 'state', 'date_order'])
+            self.env['sale.order.line'].flush_model(['order_id', 'product_id'])
+            partner_ids, product_ids = zip(*pairs)
+            # Commande confirmée la plus récente par couple (équivalent de search(limit=1, order='date_order desc'))
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (so.partner_id, sol.product_id)
+                       so.partner_id, sol.product_id, so.id
+                  FROM unnest(%s::int[], %s::int[]) AS pair(partner_id, product_id)
+                  JOIN sale_order so ON so.partner_id = pair.partner_id
+                                    AND so.state IN ('sale', 'done')
+                  JOIN sale_order_line sol ON sol.order_id = so.id
+                                          AND sol.product_id = pair.product_id
+              ORDER BY so.partner_id, sol.product_id, so.date_order DESC, so.id DESC
+            """, [list(partner_ids), list(product_ids)])
+            latest_sale = {(partner_id, product_id): sale_id
+                           for partner_id, product_id, sale_id in self.env.cr.fetchall()}
+
         for record in self:
-            if record.partner_id and record.product_id:
-                sale = self.env['sale.order'].search([
-                    ('partner_id', '=', record.partner_id.id),
-                    ('state', 'in', ['sale', 'done']),
-                    ('order_line.product_id', '=', record.product_id.id)
-                ], limit=1, order='date_order desc')
-                record.sale_order_id = sale
-            else:
-                record.sale_order_id = False
+            sale_id = latest_sale.get((record.partner_id.id, record.product_id.id))
+            record.sale_order_id = sale_id or False
 
-    @api.onchange('description')
-    def _onchange_ai_triage(self):
-        # 1. Sécurité : Si la description est vidée, on réinitialise les alertes
-        if not self.description:
-            self.priority = '1'
-            self.bio_hazard = False
-            self.ai_analysis_log = False
-            self.category = False
-            return
+    # ========== COUCHE 1 : REGEX (Hard Security) ==========
+    @api.model
+    def _regex_triage(self, description):
+        """Applique les règles de sécurité et renvoie (priorité, risque bio, avertissements).
 
-        text = self.description.lower()
+        La priorité vaut ``None`` si aucune règle de gravité ne s'applique : c'est
+        à l'appelant de garder la valeur existante ou de prendre la valeur par défaut.
+        """
+        matches = safety_rules.ENGINE.scan(description)
         warnings = []
-        
-        # ========== COUCHE 1 : REGEX (Hard Security) ==========
-        # Priorité 3 (Urgence Vitale / Danger Incendie)
-        critical_patterns = [r'fumée', r'feu\b', r'étincelle', r'brûlé', r'explosion', r'choc', r'court-circuit']
-        # Priorité 2 (Panne Bloquante / Inutilisable)
-        high_patterns = [r'panne', r'bloqué', r'erreur', r'anomalie', r'dysfonctionnement', r'cassé', r'ne démarre plus']
-        # Risque Bio (Indépendant de la priorité technique)
-        bio_patterns = [r'sang', r'virus', r'bactérie', r'fluide', r'contamin', r'covid', r'exposition']
 
         # LOGIQUE DE TRIAGE TECHNIQUE
-        new_priority = '1'  # Par défaut : Normale (1 étoile)
+        priority = None  # Aucune règle : la priorité existante (ou Normale) est conservée
         
-        if any(re.search(p, text) for p in critical_patterns):
-            new_priority = '3'  # Critique (3 étoiles)
+        if safety_rules.TIER_CRITICAL in matches:
+            priority = '3'  # Critique (3 étoiles)
             warnings.append("🚨 ALERTE CRITIQUE : Risque d'incendie ou d'accident majeur détecté.")
-        elif any(re.search(p, text) for p in high_patterns):
-            new_priority = '2'  # Élevée (2 étoiles)
+        elif safety_rules.TIER_HIGH in matches:
+            priority = '2'  # Élevée (2 étoiles)
             warnings.append("⚠️ PANNE MAJEURE : L'équipement est hors-service et nécessite une intervention rapide.")
-        
-        self.priority = new_priority
 
         # LOGIQUE DE RISQUE BIOLOGIQUE
-        if any(re.search(p, text) for p in bio_patterns):
-            self.bio_hazard = True
+        bio_hazard = safety_rules.TIER_BIO in matches
+        if bio_hazard:
             warnings.append("☣️ RISQUE BIOLOGIQUE : Présence de contaminants suspectée. Protocole EPI requis.")
-        else:
+
+        if matches:
+            _logger.debug(f"Safety rules matched: {matches}")
+        return priority, bio_hazard, warnings
+
+    @api.model
+    def _ml_client(self):
+        # Client partagé par le worker (session keep-alive + disjoncteur), paramétré
+        # depuis ir.config_parameter (lecture mise en cache par Odoo)
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        ML_CLIENT.configure(
+            url=get_param('biomed_maintenance.ml_engine_url', 'http://ml_engine:5000'),
+            timeout=float(get_param('biomed_maintenance.ml_timeout', 3)),
+            batch_timeout=float(get_param('biomed_maintenance.ml_batch_timeout', 30)),
+            failure_threshold=int(get_param('biomed_maintenance.ml_breaker_threshold', 3)),
+            cooldown=float(get_param('biomed_maintenance.ml_breaker_cooldown', 60)),
+        )
+        return ML_CLIENT
+
+    @api.model
+    def _ml_triage_mode(self):
+        # 'sync' : appel ML dans l'onchange / 'async' : file d'attente vidée par cron
+        return self.env['ir.config_parameter'].sudo().get_param(ML_TRIAGE_MODE_PARAM, 'sync')
+
+    @api.model
+    def _ml_log_line(self, ml_result):
+        confidence_pct = ml_result.get('confidence', 0) * 100
+        line = f"🤖 ML : {ml_result.get('category')} ({confidence_pct:.0f}% confiance)"
+        interval = ml_result.get('duration_interval')
+        if interval:
+            line += f" - durée estimée {ml_result.get('suggested_duration')} h [{interval[0]} - {interval[1]} h]"
+        return line
+
+    @api.onchange('description')
+    def _onchange_ai_triage(self):
+        # 1. Sécurité : Si la description est vidée, on réinitialise les alertes
+        if not self.description:
+            self.priority = '1'
             self.bio_hazard = False
+            self.ai_analysis_log = False
+            self.category = False
+            return
+
+        # ========== COUCHE 1 : REGEX (Hard Security) ==========
+        priority, self.bio_hazard, warnings = self._regex_triage(self.description)
+        self.priority = priority or '1'  # Par défaut : Normale (1 étoile)
 
         # ========== COUCHE 2 : MACHINE LEARNING (Soft Intelligence) ==========
-        if len(self.description) > 15:
-            try:
-                response = requests.post(
-                    'http://ml_engine:5000/predict',
-                    json={'description': self.description},
-                    timeout=3
-                )
+        # En mode asynchrone, le ML est mis en file d'attente à l'enregistrement (voir write/create)
+        if len(self.description) > ML_MIN_DESCRIPTION_LENGTH and self._ml_triage_mode() == 'sync':
+            # None si le service est down ou le disjoncteur ouvert : on continue avec Regex seul
+            ml_result = self._ml_client().predict(self.description, self.product_id.id or None)
+            
+            if ml_result:
+                # Auto-complétion de la catégorie
+                self.category = ml_result.get('category')
+                self.ml_category = self.category
                 
-                if response.status_code == 200:
-                    ml_result = response.json()
-                    
-                    # Auto-complétion de la catégorie
-                    self.category = ml_result.get('category')
-                    
-                    # Suggestion de durée (si pas déjà remplie)
-                    if not self.duration or self.duration == 1.0:
-                        self.duration = ml_result.get('suggested_duration', 1.0)
-                    
-                    # Ajout du log ML
-                    confidence_pct = ml_result.get('confidence', 0) * 100
-                    warnings.append(f"🤖 ML : {self.category} ({confidence_pct:.0f}% confiance)")
-                    
-                    _logger.info(f"ML Prediction: {ml_result}")
+                # Suggestion de durée (si pas déjà remplie)
+                if not self.duration or self.duration == 1.0:
+                    self.duration = ml_result.get('suggested_duration', 1.0)
                 
-                else:
-                    _logger.warning(f"ML API returned status {response.status_code}")
-            
-            except requests.exceptions.RequestException as e:
-                # Si le microservice est down, on continue avec Regex seul
-                _logger.warning(f"ML service unavailable: {e}")
-                pass
+                # Ajout du log ML
+                warnings.append(self._ml_log_line(ml_result))
+                
+                _logger.info(f"ML Prediction: {ml_result}")
 
         # ========== FEEDBACK UTILISATEUR ==========
         if warnings:
@@ -155,12 +268,318 @@ class BiomedMaintenanceOrder(models.Model):
         else:
             self.ai_analysis_log = False
 
+    # ========== RE-TRIAGE DE MASSE (Import, XML-RPC, Email, Cron) ==========
+    @api.model
+    def _ml_predict_batch(self, descriptions, product_ids=None):
+        return self._ml_client().predict_batch(descriptions, ML_BATCH_SIZE, product_ids)
+
+    def action_ai_triage(self):
+        """Rejoue le triage Regex + ML sur tout le recordset.
+
+        Les descriptions éligibles partent au ML Engine en lots. Les champs
+        partagés (priorité, risque bio, catégorie, date de tentative) sont
+        écrits avec un ``write()`` par groupe de valeurs identiques ; le log et
+        la durée, propres à chaque ordre, en une seule requête
+        (``_write_ml_details``).
+
+        Comme dans ``_triage_vals``, la priorité et le risque bio ne sont
+        jamais abaissés : ils ne sont remontés que si une règle se déclenche.
+        """
+        records = self.filtered('description')
+        eligible = records.filtered(lambda r: len(r.description) > ML_MIN_DESCRIPTION_LENGTH)
+        predictions, reached = self._ml_predict_batch(eligible.mapped('description'),
+                                                      [r.product_id.id or None for r in eligible])
+        ml_results = dict(zip(eligible.ids, predictions))
+        # Ordres que le ML Engine n'a pas reçus (indisponible) : non marqués comme tentés
+        unreached_ids = {record_id for record_id, ok in zip(eligible.ids, reached) if not ok}
+        now = fields.Datetime.now()
+
+        groups = defaultdict(list)
+        details = {}
+        for record in records:
+            priority, bio_hazard, warnings = self._regex_triage(record.description)
+            vals = {}
+            if priority and priority > (record.priority or '1'):
+                vals['priority'] = priority
+            if bio_hazard and not record.bio_hazard:
+                vals['bio_hazard'] = True
+            if record.id not in unreached_ids:
+                vals['ml_triage_date'] = now
+
+            duration = None
+            ml_result = ml_results.get(record.id)
+            if ml_result:
+                vals['category'] = vals['ml_category'] = ml_result.get('category')
+                if not record.duration or record.duration == 1.0:
+                    duration = ml_result.get('suggested_duration', 1.0)
+                warnings.append(self._ml_log_line(ml_result))
+
+            details[record.id] = ("\n".join(warnings) if warnings else None, duration)
+            if vals:
+                groups[tuple(sorted(vals.items()))].append(record.id)
+
+        for vals, ids in groups.items():
+            self.browse(ids).write(dict(vals))
+        self._write_ml_details(details)
+
+        _logger.info(f"AI triage: {len(records)} orders, {len(eligible)} sent to ML, {len(groups)} writes")
+        return True
+
+    @api.model
+    def _write_ml_details(self, details):
+        """Écrit en une requête le log IA et la durée suggérée, propres à chaque ordre.
+
+        ``details`` : {id: (log, durée ou None pour garder la durée actuelle)}.
+        Ces deux champs ne sont ni suivis dans le Chatter ni utilisés par un
+        champ calculé : un ``write()`` par ordre n'apporterait rien.
+        """
+        if not details:
+            return
+        ids = list(details)
+        logs, durations = zip(*details.values())
+        self.env.cr.execute(f"""
+            UPDATE {self._table} AS o
+               SET ai_analysis_log = v.log,
+                   duration = COALESCE(v.duration, o.duration),
+                   write_uid = %s,
+                   write_date = (now() AT TIME ZONE 'UTC')
+              FROM unnest(%s::int[], %s::text[], %s::float8[]) AS v(id, log, duration)
+             WHERE o.id = v.id
+        """, [self.env.uid, ids, list(logs), list(durations)])
+        self.browse(ids).invalidate_recordset(['ai_analysis_log', 'duration', 'write_uid', 'write_date'])
+
+    def _apply_ml_results(self, ml_results):
+        """Écrit les résultats ML reçus hors du formulaire (file d'attente).
+
+        Seuls ``category``, ``duration`` et ``ai_analysis_log`` sont mis à
+        jour : la priorité et le risque bio restent ceux fixés par la couche
+        Regex ou par l'utilisateur. Chaque résultat est tracé dans le Chatter.
+        """
+        groups = defaultdict(list)
+        details = {}
+        for record in self:
+            ml_result = ml_results[record.id]
+            warnings = self._regex_triage(record.description)[2]
+            warnings.append(self._ml_log_line(ml_result))
+            duration = None
+            if not record.duration or record.duration == 1.0:
+                duration = ml_result.get('suggested_duration', 1.0)
+            details[record.id] = ("\n".join(warnings), duration)
+            groups[ml_result.get('category')].append(record.id)
+
+        for category, ids in groups.items():
+            self.browse(ids).write({'category': category, 'ml_category': category})
+        self._write_ml_details(details)
+
+        for record in self:
+            record.message_post(body=self._ml_log_line(ml_results[record.id]))
+
+    def _enqueue_ml_triage(self):
+        if self._ml_triage_mode() != 'async':
+            return
+        eligible = self.filtered(lambda r: r.description and len(r.description) > ML_MIN_DESCRIPTION_LENGTH)
+        if eligible:
+            self.env['biomed.ml.triage.job'].sudo()._enqueue(eligible)
+
+    # ========== FEEDBACK : EXPORT DES ORDRES CLÔTURÉS VERS LE ML ENGINE ==========
+    @api.model
+    def _cron_export_ml_feedback(self, batch_size=ML_BATCH_SIZE, max_batches=20):
+        """Envoie au ML Engine les ordres clôturés depuis le dernier export.
+
+        Un point de reprise (date de clôture, id) est stocké dans
+        ``ir.config_parameter`` : chaque passage ne lit que les nouveaux ordres
+        via l'index sur ``date_done``, sans rebalayer toute la table.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        client = self._ml_client()
+        for _ in range(max_batches):
+            hwm_date, _sep, hwm_id = (ICP.get_param(ML_FEEDBACK_HWM_PARAM) or '').partition('|')
+            domain = [('state', '=', 'done'), ('category', '!=', False), ('date_done', '!=', False)]
+            if hwm_date:
+                domain += ['|', ('date_done', '>', hwm_date),
+                           '&', ('date_done', '=', hwm_date), ('id', '>', int(hwm_id))]
+            orders = self.search(domain, order='date_done, id', limit=batch_size)
+            if not orders:
+                break
+
+            items = [{
+                'description': order.description,
+                'category': order.category,
+                'ml_category': order.ml_category or None,
+                'corrected': bool(order.ml_category) and order.ml_category != order.category,
+                'duration': order.duration,
+                'product_id': order.product_id.id or None,
+            } for order in orders]
+            if client.send_feedback(items) is None:
+                # ML Engine indisponible : le point de reprise n'avance pas
+                break
+
+            last = orders[-1]
+            ICP.set_param(ML_FEEDBACK_HWM_PARAM, f"{fields.Datetime.to_string(last.date_done)}|{last.id}")
+            _logger.info(f"ML feedback: {len(orders)} closed orders exported "
+                         f"({sum(item['corrected'] for item in items)} corrections)")
+            self.env.cr.commit()
+
+    @api.model
+    def _cron_ai_triage(self, limit=5000):
+        if self._ml_triage_mode() == 'async':
+            # La file biomed.ml.triage.job traite déjà ces ordres
+            return
+        # Ordres ouverts jamais classés (créés par import, XML-RPC ou email) et pas encore tentés
+        orders = self.search([
+            ('state', 'not in', ['done', 'cancelled']),
+            ('category', '=', False),
+            ('ml_triage_date', '=', False),
+        ], limit=limit, order='id')
+        for start in range(0, len(orders), ML_BATCH_SIZE):
+            orders[start:start + ML_BATCH_SIZE].action_ai_triage()
+            # Commit par lot : un cron interrompu ne perd pas le travail déjà fait
+            self.env.cr.commit()
+
+    # ========== PLANIFICATION (TECHNICIEN + DATE PRÉVUE) ==========
+    @api.model
+    def _schedule_orders(self, orders=None):
+        """Affecte les ordres confirmés sans technicien (voir tools/scheduler.py).
+
+        Les données sont lues en quelques requêtes (ordres, compétences, charge
+        par ``read_group``), l'affectation est calculée en mémoire puis écrite
+        par groupes de valeurs identiques.
+        """
+        if orders is None:
+            orders = self.search([('state', '=', 'confirmed'), ('technician_id', '=', False)])
+        else:
+            orders = orders.filtered(lambda o: o.state == 'confirmed' and not o.technician_id)
+        if not orders:
+            return {'assigned': 0, 'unassigned': 0}
+
+        skills = defaultdict(dict)
+        for skill in self.env['biomed.technician.skill'].sudo().search([('user_id.active', '=', True)]):
+            skills[skill.user_id.id][skill.category] = int(skill.level)
+        users = self.env['res.users'].sudo().browse(list(skills))
+        # Charge actuelle : ordres confirmés déjà assignés + ordres en cours
+        load = dict(
+            (technician.id, duration or 0.0) for technician, duration in self._read_group(
+                [('state', 'in', ('confirmed', 'in_progress')), ('technician_id', 'in', users.ids)],
+                ['technician_id'], ['duration:sum'])
+        )
+        technicians = [
+            scheduler.Technician(user.id, skills[user.id], user.biomed_ppe_qualified,
+                                 user.biomed_daily_capacity, load.get(user.id, 0.0))
+            for user in users
+        ]
+
+        # Le planificateur raisonne en heure locale (journées ouvrées), Odoo stocke en UTC
+        tz = pytz.timezone(self.env.context.get('tz') or self.env.user.tz or 'UTC')
+        local_now = pytz.utc.localize(fields.Datetime.now()).astimezone(tz).replace(tzinfo=None)
+        assignments, unassigned = scheduler.Scheduler(
+            technicians, start=local_now, horizon_days=SCHEDULER_HORIZON_DAYS
+        ).assign([scheduler.Order(o.id, o.category, o.priority, o.bio_hazard, o.duration) for o in orders])
+
+        by_technician = defaultdict(list)
+        by_date = defaultdict(list)
+        for assignment in assignments:
+            by_technician[assignment.technician_id].append(assignment.order_id)
+            utc_date = tz.localize(assignment.date_scheduled).astimezone(pytz.utc).replace(tzinfo=None)
+            by_date[utc_date].append(assignment.order_id)
+        # Un write par technicien et un par créneau, pas un par ordre
+        for technician_id, order_ids in by_technician.items():
+            self.browse(order_ids).write({'technician_id': technician_id})
+        for date, order_ids in by_date.items():
+            self.browse(order_ids).write({'date_scheduled': date})
+
+        _logger.info(f"Scheduler: {len(assignments)} orders assigned to {len(by_technician)} technicians, "
+                     f"{len(unassigned)} without eligible technician")
+        return {'assigned': len(assignments), 'unassigned': len(unassigned)}
+
+    def action_schedule(self):
+        """Planification à la demande (action de la vue liste)."""
+        result = self._schedule_orders(self)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Planification'),
+                'message': _('%(assigned)s ordre(s) assigné(s), %(unassigned)s sans technicien disponible.',
+                             **result),
+                'type': 'warning' if result['unassigned'] else 'success',
+            }
+        }
+
+    @api.model
+    def _cron_schedule_orders(self):
+        self._schedule_orders()
+
     # --- WORKFLOW (LES BOUTONS) ---
     @api.model
-    def create(self, vals):
-        if vals.get('name', _('Nouveau')) == _('Nouveau'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('biomed.maintenance.order') or _('Nouveau')
-        return super(BiomedMaintenanceOrder, self).create(vals)
+    def _reserve_names(self, count):
+        """Réserve ``count`` références de la séquence en une seule requête."""
+        if not count:
+            return []
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', SEQUENCE_CODE),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence or sequence.use_date_range:
+            # Séquence par période : on garde l'allocation standard
+            return [self.env['ir.sequence'].next_by_code(SEQUENCE_CODE) or _('Nouveau') for _i in range(count)]
+
+        if sequence.implementation == 'standard':
+            # Séquence PostgreSQL (pas de verrou) : count appels à nextval dans un seul aller-retour
+            self.env.cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)",
+                                [f'ir_sequence_{sequence.id:03d}', count])
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            # Sans trou : un seul verrou et une seule mise à jour pour tout le lot
+            self.env.cr.execute("SELECT number_next FROM ir_sequence WHERE id = %s FOR UPDATE NOWAIT",
+                                [sequence.id])
+            first = self.env.cr.fetchone()[0]
+            self.env.cr.execute("UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s",
+                                [sequence.number_increment * count, sequence.id])
+            sequence.invalidate_recordset(['number_next'])
+            numbers = [first + i * sequence.number_increment for i in range(count)]
+        return [sequence.get_next_char(number) for number in numbers]
+
+    @api.model
+    def _triage_vals(self, vals):
+        """Couche Regex appliquée aux valeurs de création (import, XML-RPC, flux GMAO).
+
+        La priorité et le risque bio ne sont jamais abaissés : une valeur fournie
+        par l'appelant (ou par l'onchange du formulaire) n'est remontée que si la
+        description déclenche une règle plus grave.
+        """
+        priority, bio_hazard, warnings = self._regex_triage(vals['description'])
+        if priority:
+            vals['priority'] = max(vals.get('priority') or '1', priority)
+        if bio_hazard:
+            vals['bio_hazard'] = True
+        if warnings and not vals.get('ai_analysis_log'):
+            vals['ai_analysis_log'] = "\n".join(warnings)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if self.env.context.get(BULK_IMPORT_CONTEXT):
+            # Ni suivi des champs, ni message « créé », ni abonnement des followers
+            self = self.with_context(tracking_disable=True)
+
+        to_name = [vals for vals in vals_list if vals.get('name', _('Nouveau')) == _('Nouveau')]
+        for vals, name in zip(to_name, self._reserve_names(len(to_name))):
+            vals['name'] = name
+        for vals in vals_list:
+            if vals.get('description'):
+                self._triage_vals(vals)
+
+        records = super(BiomedMaintenanceOrder, self).create(vals_list)
+        records._enqueue_ml_triage()
+        return records
+
+    def write(self, vals):
+        if 'description' in vals and 'ml_triage_date' not in vals:
+            # Nouvelle description : le cron de triage peut la retenter
+            vals = dict(vals, ml_triage_date=False)
+        res = super(BiomedMaintenanceOrder, self).write(vals)
+        if 'description' in vals:
+            self._enqueue_ml_triage()
+        return res
 
     def action_confirm(self):
         self.state = 'confirmed'
@@ -169,7 +588,7 @@ class BiomedMaintenanceOrder(models.Model):
         self.state = 'in_progress'
 
     def action_done(self):
-        self.state = 'done'
+        self.write({'state': 'done', 'date_done': fields.Datetime.now()})
 
     def action_cancel(self):
         for record in self:
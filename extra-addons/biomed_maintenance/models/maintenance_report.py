@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, tools
+
+from .maintenance_order import CATEGORY_SELECTION
+
+
+class BiomedMaintenanceReport(models.Model):
+    """Tableau de bord des ordres (vue SQL, lecture seule).
+
+    Les vues pivot et graphe n'interrogent ce modèle que par ``read_group`` :
+    l'agrégation (nombre d'ordres, durée moyenne) est faite par PostgreSQL
+    sans charger un seul enregistrement. Le filtre « Ouverts » utilise la
+    même liste d'états que l'index partiel de ``biomed_maintenance_order``.
+    """
+    _name = 'biomed.maintenance.report'
+    _description = 'Analyse des Ordres de Maintenance'
+    _auto = False
+    _rec_name = 'category'
+    _order = 'priority desc'
+
+    state = fields.Selection([
+        ('draft', 'Brouillon'),
+        ('confirmed', 'Confirmé'),
+        ('in_progress', 'En cours'),
+        ('done', 'Terminé'),
+        ('cancelled', 'Annulé')
+    ], string='Statut', readonly=True)
+    category = fields.Selection(CATEGORY_SELECTION, string='Catégorie Technique', readonly=True)
+    priority = fields.Selection([('0', 'Basse'), ('1', 'Normale'), ('2', 'Elevée'), ('3', 'URGENCE')],
+                                string='Priorité', readonly=True)
+    technician_id = fields.Many2one('res.users', string='Technicien', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Client', readonly=True)
+    bio_hazard = fields.Boolean(string='Risque Bio', readonly=True)
+    date_scheduled = fields.Datetime(string='Date Prévue', readonly=True)
+    order_count = fields.Integer(string="Nombre d'ordres", readonly=True)
+    duration = fields.Float(string='Durée moyenne (h)', group_operator='avg', readonly=True)
+    duration_total = fields.Float(string='Charge totale (h)', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT o.id,
+                       o.state,
+                       o.category,
+                       o.priority,
+                       o.technician_id,
+                       o.partner_id,
+                       o.bio_hazard,
+                       o.date_scheduled,
+                       1 AS order_count,
+                       o.duration,
+                       o.duration AS duration_total
+                  FROM biomed_maintenance_order o
+            )
+        """)
+
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+ML_JOB_MAX_ATTEMPTS = 5
+ML_JOB_RETENTION_DAYS = 7
+
+
+class BiomedMlTriageJob(models.Model):
+    _name = 'biomed.ml.triage.job'
+    _description = 'Tâche de Triage ML en attente'
+    _order = 'id'
+
+    order_id = fields.Many2one('biomed.maintenance.order', string='Ordre', required=True,
+                               ondelete='cascade', index=True)
+    state = fields.Selection([
+        ('pending', 'En attente'),
+        ('done', 'Traitée'),
+        ('failed', 'Échec')
+    ], string='Statut', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Tentatives', default=0)
+    date_done = fields.Datetime(string='Traitée le')
+
+    @api.model
+    def _enqueue(self, orders):
+        # Une seule tâche en attente par ordre : la description est relue au moment du traitement
+        pending = self.search([('order_id', 'in', orders.ids), ('state', '=', 'pending')])
+        new_orders = orders - pending.order_id
+        if new_orders:
+            self.create([{'order_id': order.id} for order in new_orders])
+            self.env.ref('biomed_maintenance.ir_cron_biomed_ml_triage_jobs')._trigger()
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=500, max_batches=20):
+        Order = self.env['biomed.maintenance.order']
+        tried = self.browse()
+        for _ in range(max_batches):
+            # Une tâche en échec n'est retentée qu'au prochain passage du cron
+            jobs = self.search([('state', '=', 'pending'), ('id', 'not in', tried.ids)], limit=batch_size)
+            if not jobs:
+                break
+
+            orders = jobs.order_id.filtered('description')
+            predictions, reached = Order._ml_predict_batch(orders.mapped('description'),
+                                                           [o.product_id.id or None for o in orders])
+            ml_results = {order.id: result for order, result in zip(orders, predictions) if result}
+            reached_ids = {order.id for order, ok in zip(orders, reached) if ok}
+            if orders and not reached_ids:
+                # ML Engine indisponible ou disjoncteur ouvert : ce n'est pas un échec des tâches,
+                # elles restent en attente sans tentative comptée
+                _logger.info(f"ML triage queue: ML engine unavailable, {len(jobs)} jobs left pending")
+                break
+
+            tried |= jobs
+            succeeded = jobs.filtered(lambda j: j.order_id.id in ml_results)
+            # Refus par le ML Engine (erreur par élément, 4xx) ou ordre sans description : tentative comptée.
+            # Un élément que le service n'a pas reçu (panne en cours de passage) reste en attente.
+            failed = jobs.filtered(lambda j: j.order_id.id in reached_ids or not j.order_id.description) - succeeded
+            orders.filtered(lambda o: o.id in ml_results)._apply_ml_results(ml_results)
+
+            succeeded.write({'state': 'done', 'date_done': fields.Datetime.now()})
+            for job in failed:
+                job.attempts += 1
+                if job.attempts >= ML_JOB_MAX_ATTEMPTS:
+                    job.state = 'failed'
+
+            _logger.info(f"ML triage queue: {len(succeeded)} done, {len(failed)} retried, "
+                         f"{len(jobs) - len(succeeded) - len(failed)} not sent")
+            # Commit par lot : les résultats déjà reçus ne sont pas perdus
+            self.env.cr.commit()
+
+    @api.autovacuum
+    def _gc_done_jobs(self):
+        limit_date = fields.Datetime.subtract(fields.Datetime.now(), days=ML_JOB_RETENTION_DAYS)
+        self.search([('state', '=', 'done'), ('date_done', '<', limit_date)]).unlink()
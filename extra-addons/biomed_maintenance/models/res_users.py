@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+from .maintenance_order import CATEGORY_SELECTION
+
+
+class BiomedTechnicianSkill(models.Model):
+    _name = 'biomed.technician.skill'
+    _description = 'Compétence Technicien BioMed'
+    _order = 'user_id, level desc'
+
+    user_id = fields.Many2one('res.users', string='Technicien', required=True, ondelete='cascade', index=True)
+    category = fields.Selection(CATEGORY_SELECTION, string='Catégorie Technique', required=True)
+    level = fields.Selection([('1', 'Débutant'), ('2', 'Confirmé'), ('3', 'Expert')],
+                             string='Niveau', default='1', required=True)
+
+    _sql_constraints = [
+        ('user_category_uniq', 'unique(user_id, category)', 'Une seule compétence par catégorie et par technicien.'),
+    ]
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # Un utilisateur avec au moins une compétence est pris en compte par le planificateur
+    biomed_skill_ids = fields.One2many('biomed.technician.skill', 'user_id', string='Compétences BioMed')
+    biomed_ppe_qualified = fields.Boolean(string='Habilité EPI (risque bio)')
+    biomed_daily_capacity = fields.Float(string='Capacité (h/jour)', default=8.0)
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# Utilitaires purs Python (sans dépendance Odoo) partagés par les modèles.
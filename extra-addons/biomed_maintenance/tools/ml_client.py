@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""Client HTTP du ML Engine, partagé par tous les appels d'un worker Odoo.
+
+* Session ``requests`` persistante (keep-alive, pool de connexions) par thread.
+* Disjoncteur : après ``failure_threshold`` échecs consécutifs, les appels
+  échouent immédiatement (retour au Regex seul) pendant ``cooldown`` secondes,
+  puis un seul appel d'essai décide de la réouverture.
+* Compteurs de latence / erreurs / état du disjoncteur, journalisés
+  périodiquement pour mesurer le coût de la couche ML par worker.
+"""
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+STATS_LOG_EVERY = 100  # Journalise les compteurs toutes les N requêtes
+
+
+class MlEngineClient:
+
+    def __init__(self):
+        self.url = 'http://ml_engine:5000'
+        self.timeout = 3.0
+        self.batch_timeout = 30.0
+        self.failure_threshold = 3
+        self.cooldown = 60.0
+        # Taille de lot maximale annoncée par le serveur (réponse 413), None = inconnue
+        self.max_batch_size = None
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._state = BREAKER_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self.stats = {
+            'requests': 0,
+            'errors': 0,
+            'short_circuited': 0,
+            'breaker_opened': 0,
+            'latency_total_ms': 0.0,
+            'latency_max_ms': 0.0,
+        }
+
+    def configure(self, url, timeout, batch_timeout, failure_threshold, cooldown):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.batch_timeout = batch_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    # ========== SESSION HTTP (une par thread, réutilisée) ==========
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None or self._local.pid != os.getpid():
+            # Nouvelle session après un fork : les sockets du parent ne sont pas réutilisables
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+            self._local.pid = os.getpid()
+        return session
+
+    # ========== DISJONCTEUR ==========
+    @property
+    def state(self):
+        return self._state
+
+    def _allow_request(self):
+        with self._lock:
+            if self._state == BREAKER_CLOSED:
+                return True
+            if self._state == BREAKER_OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = BREAKER_HALF_OPEN
+                _logger.info("ML client: circuit breaker half-open, sending a trial request")
+            if self._state == BREAKER_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.stats['short_circuited'] += 1
+            return False
+
+    def _record_success(self):
+        with self._lock:
+            if self._state != BREAKER_CLOSED:
+                _logger.info("ML client: circuit breaker closed, ML engine is back")
+            self._state = BREAKER_CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def _record_failure(self):
+        with self._lock:
+            self.stats['errors'] += 1
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._state == BREAKER_HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != BREAKER_OPEN:
+                    self.stats['breaker_opened'] += 1
+                    _logger.warning(f"ML client: circuit breaker OPEN for {self.cooldown:.0f}s "
+                                    f"after {self._consecutive_failures} failures, falling back to regex only")
+                self._state = BREAKER_OPEN
+                self._opened_at = time.monotonic()
+
+    # ========== APPELS ==========
+    def _request(self, path, payload, timeout):
+        """Renvoie (statut HTTP, corps JSON ou None).
+
+        Le statut vaut None si le service n'a pas répondu utilement : disjoncteur
+        ouvert, erreur réseau, erreur 5xx ou corps non JSON. Une erreur 4xx est
+        une réponse du service (requête refusée), pas une panne.
+        """
+        if not self._allow_request():
+            return None, None
+
+        start = time.perf_counter()
+        try:
+            response = self._session().post(f'{self.url}{path}', json=payload, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            _logger.warning(f"ML service unavailable: {e}")
+            self._record_failure()
+            return None, None
+        finally:
+            self._record_latency((time.perf_counter() - start) * 1000)
+
+        if response.status_code >= 500:
+            _logger.warning(f"ML API returned status {response.status_code}")
+            self._record_failure()
+            return None, None
+        if response.status_code not in (200, 202):
+            self._record_success()
+            _logger.warning(f"ML API returned status {response.status_code}")
+            try:
+                return response.status_code, response.json()
+            except ValueError:
+                return response.status_code, None
+        try:
+            data = response.json()
+        except ValueError:
+            # Corps non JSON (page d'erreur d'un proxy...) : compté comme une panne du service
+            _logger.warning(f"ML API returned a non-JSON body (status {response.status_code})")
+            self._record_failure()
+            return None, None
+        self._record_success()
+        return response.status_code, data
+
+    def _post(self, path, payload, timeout):
+        status, data = self._request(path, payload, timeout)
+        return data if status in (200, 202) else None
+
+    def _record_latency(self, latency_ms):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['latency_total_ms'] += latency_ms
+            self.stats['latency_max_ms'] = max(self.stats['latency_max_ms'], latency_ms)
+            log_stats = self.stats['requests'] % STATS_LOG_EVERY == 0
+        if log_stats:
+            _logger.info(f"ML client stats (pid {os.getpid()}): {self.stats_summary()}")
+
+    def stats_summary(self):
+        requests_count = self.stats['requests']
+        return dict(
+            self.stats,
+            breaker_state=self._state,
+            latency_avg_ms=self.stats['latency_total_ms'] / requests_count if requests_count else 0.0,
+        )
+
+    def predict(self, description, product_id=None):
+        """Renvoie le résultat de /predict, ou None si le ML n'est pas disponible."""
+        return self._post('/predict', {'description': description, 'product_id': product_id}, self.timeout)
+
+    def send_feedback(self, items):
+        """Envoie des ordres clôturés à /feedback ; None si l'envoi a échoué."""
+        return self._post('/feedback', {'items': items}, self.batch_timeout)
+
+    def predict_batch(self, descriptions, batch_size, product_ids=None):
+        """Classe les descriptions par lots via /predict_batch.
+
+        ``product_ids`` (optionnel, aligné sur ``descriptions``) affine la durée
+        estimée par le régresseur du ML Engine. Les lots sont réduits à la
+        taille maximale annoncée par le serveur s'il répond 413.
+
+        Renvoie (résultats, atteints), deux listes alignées sur ``descriptions`` :
+        un résultat vaut None si le ML n'a pas classé l'élément ; ``atteints[i]``
+        est False si le ML Engine n'a pas répondu pour cet élément (service
+        indisponible, disjoncteur ouvert), True s'il l'a traité ou refusé.
+        """
+        results = [None] * len(descriptions)
+        reached = [False] * len(descriptions)
+        start = 0
+        while start < len(descriptions):
+            size = min(batch_size, self.max_batch_size or batch_size)
+            chunk = descriptions[start:start + size]
+            payload = {'descriptions': chunk}
+            if product_ids is not None:
+                payload['product_ids'] = product_ids[start:start + size]
+            status, response = self._request('/predict_batch', payload, self.batch_timeout)
+            if status is None:
+                if self._state == BREAKER_OPEN:
+                    # Service down : inutile d'envoyer les lots suivants
+                    break
+                start += len(chunk)
+                continue
+            if status == 413 and self._learn_max_batch_size(response, len(chunk)):
+                continue  # Même position, lot plus petit
+            reached[start:start + len(chunk)] = [True] * len(chunk)
+            if status == 200:
+                for item in response.get('results', []):
+                    if 'error' not in item:
+                        results[start + item['index']] = item
+            start += len(chunk)
+        return results, reached
+
+    def _learn_max_batch_size(self, response, sent):
+        """Retient la taille maximale renvoyée avec un 413 ; False si elle n'aide pas."""
+        try:
+            max_batch_size = int(response['max_batch_size'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if not 0 < max_batch_size < sent:
+            return False
+        _logger.warning(f"ML client: batch of {sent} rejected, server max_batch_size is {max_batch_size}")
+        self.max_batch_size = max_batch_size
+        return True
+
+
+# Un client par processus (worker Odoo)
+CLIENT = MlEngineClient()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Moteur de règles de sécurité (Couche 1 : Regex) compilé une seule fois.
+
+Les règles sont préparées au chargement du module : les motifs littéraux
+sont testés avec une recherche de sous-chaîne (C natif, sans passer par le
+cache ``re``) et seuls les vrais motifs regex sont compilés. Le balayage
+s'arrête à la première règle déclenchée de chaque niveau.
+
+Motifs et descriptions passent par ``text_normalizer`` (minuscules, sans
+accents) : « FUMEE », « fumee » et « Fumée » déclenchent la même règle.
+"""
+import re
+
+from . import text_normalizer
+
+# Niveaux de règles
+TIER_CRITICAL = 'critical'  # Priorité 3 (Urgence Vitale / Danger Incendie)
+TIER_HIGH = 'high'          # Priorité 2 (Panne Bloquante / Inutilisable)
+TIER_BIO = 'bio'            # Risque Bio (Indépendant de la priorité technique)
+
+# (niveau, motif) — écrits en minuscules ; les accents sont retirés à la compilation
+SAFETY_RULES = [
+    (TIER_CRITICAL, r'fumée'),
+    (TIER_CRITICAL, r'feu\b'),
+    (TIER_CRITICAL, r'étincelle'),
+    (TIER_CRITICAL, r'brûlé'),
+    (TIER_CRITICAL, r'explosion'),
+    (TIER_CRITICAL, r'choc'),
+    (TIER_CRITICAL, r'court-circuit'),
+    (TIER_HIGH, r'panne'),
+    (TIER_HIGH, r'bloqué'),
+    (TIER_HIGH, r'erreur'),
+    (TIER_HIGH, r'anomalie'),
+    (TIER_HIGH, r'dysfonctionnement'),
+    (TIER_HIGH, r'cassé'),
+    (TIER_HIGH, r'ne démarre plus'),
+    (TIER_BIO, r'sang'),
+    (TIER_BIO, r'virus'),
+    (TIER_BIO, r'bactérie'),
+    (TIER_BIO, r'fluide'),
+    (TIER_BIO, r'contamin'),
+    (TIER_BIO, r'covid'),
+    (TIER_BIO, r'exposition'),
+]
+
+
+# Caractères qui font d'un motif une vraie expression régulière
+REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+def _literal_matcher(literal):
+    return lambda text: literal in text
+
+
+class SafetyRuleEngine:
+    """Évalue un jeu de règles (niveau, motif) préparé une seule fois.
+
+    ``scan`` renvoie, pour chaque niveau déclenché, le premier motif qui a
+    correspondu, dans l'ordre de déclaration des règles.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._tiers = {}
+        for tier, pattern in self.rules:
+            # Accents seulement : abaisser la casse changerait le sens de \W, \B, \S...
+            pattern = text_normalizer.strip_accents(pattern)
+            if REGEX_METACHARACTERS.intersection(pattern):
+                matcher = re.compile(pattern).search
+            else:
+                matcher = _literal_matcher(pattern)
+            self._tiers.setdefault(tier, []).append((pattern, matcher))
+
+    def scan(self, text):
+        """Renvoie ``{niveau: motif}`` avec la première règle déclenchée par niveau."""
+        text = text_normalizer.fold(text)
+        matches = {}
+        for tier, tier_rules in self._tiers.items():
+            for pattern, matcher in tier_rules:
+                if matcher(text):
+                    matches[tier] = pattern
+                    break
+        return matches
+
+
+ENGINE = SafetyRuleEngine(SAFETY_RULES)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Affectation des ordres confirmés aux techniciens (glouton + files de priorité).
+
+Module sans dépendance à Odoo : ``maintenance_order.py`` lui passe des
+tuples lus en une requête et écrit le résultat.
+
+Algorithme :
+
+1. Les ordres sont triés par priorité décroissante, risque bio d'abord,
+   puis par ancienneté (id).
+2. Chaque « pool » (catégorie, EPI requis) a un tas des techniciens
+   éligibles, trié par score = charge (h) - bonus de compétence. Le
+   technicien le mieux placé est en tête : pas de recherche par ordre.
+3. Quand un technicien reçoit un ordre, sa charge augmente. Il est
+   réinséré dans ses pools avec une nouvelle version ; les entrées
+   périmées sont ignorées au moment du ``heappop`` (suppression paresseuse).
+4. La date prévue est le début du créneau libre du technicien. Chaque
+   technicien a un curseur (jour ouvré, heures utilisées ce jour-là) : sa
+   charge est déroulée journée par journée de ``capacity`` heures à partir
+   de 8 h ; seule la journée en cours est réduite des heures déjà écoulées.
+   Un ordre qui ne tient pas dans le reste de la journée commence le jour
+   ouvré suivant.
+5. Avec un horizon, un technicien dont le créneau le dépasse est écarté pour
+   cet ordre et le suivant dans le tas est essayé ; un technicien dont le
+   curseur lui-même dépasse l'horizon est retiré de tous ses pools.
+
+Complexité : O(N log T) pour N ordres et T techniciens (10 000 ordres sur
+200 techniciens en une fraction de seconde).
+"""
+import heapq
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+# Bonus par niveau de compétence au-delà de 1 : un expert reste préféré tant que
+# sa charge ne dépasse pas celle d'un débutant de plus de LEVEL_BONUS_HOURS par niveau
+LEVEL_BONUS_HOURS = 4.0
+WORKDAY_START_HOUR = 8
+ANY_CATEGORY = False  # Ordre non classé : tout technicien convient
+
+Order = namedtuple('Order', 'id category priority bio_hazard duration')
+Technician = namedtuple('Technician', 'id skills ppe_qualified capacity load')
+Assignment = namedtuple('Assignment', 'order_id technician_id date_scheduled')
+
+
+def next_workday(day):
+    while day.weekday() >= 5:  # Samedi, dimanche
+        day += timedelta(days=1)
+    return day
+
+
+def advance(day, used, hours, capacity):
+    """Déroule ``hours`` heures depuis le curseur (jour, heures utilisées), journée par journée."""
+    used += hours
+    while used >= capacity:
+        used -= capacity
+        day = next_workday(day + timedelta(days=1))
+    return day, used
+
+
+def start_cursor(start, capacity):
+    """Curseur à l'instant ``start`` : seule la journée en cours est entamée par l'heure qu'il est."""
+    day = next_workday(datetime.combine(start.date(), time()))
+    used = 0.0
+    if day.date() == start.date():
+        used = min(max(0.0, (start - day).total_seconds() / 3600 - WORKDAY_START_HOUR), capacity)
+    return advance(day, used, 0.0, capacity)
+
+
+def place(cursor, duration, capacity):
+    """Renvoie (début, curseur après l'ordre). Un ordre ne déborde pas sur la fin de journée."""
+    day, used = cursor
+    if used > 0 and used + duration > capacity:
+        day, used = next_workday(day + timedelta(days=1)), 0.0
+    begin = day + timedelta(hours=WORKDAY_START_HOUR + used)
+    return begin, advance(day, used, duration, capacity)
+
+
+class Scheduler:
+
+    def __init__(self, technicians, start=None, horizon_days=None):
+        # Heure locale (les journées ouvrées commencent à WORKDAY_START_HOUR)
+        self.start = (start or datetime.now()).replace(second=0, microsecond=0)
+        self.horizon = self.start + timedelta(days=horizon_days) if horizon_days else None
+        self.technicians = {t.id: t for t in technicians if t.capacity > 0}
+        self.load = {t.id: float(t.load) for t in self.technicians.values()}
+        # Charge existante (somme des durées) déroulée depuis maintenant
+        self.cursor = {
+            t.id: advance(*start_cursor(self.start, t.capacity), self.load[t.id], t.capacity)
+            for t in self.technicians.values()
+        }
+        self.version = dict.fromkeys(self.technicians, 0)
+        self.pools = {}
+        # Pools auxquels appartient chaque technicien (pour la réinsertion)
+        self.memberships = {tech_id: [] for tech_id in self.technicians}
+        for tech in self.technicians.values():
+            categories = list(tech.skills) + [ANY_CATEGORY]
+            for category in categories:
+                for needs_ppe in ((False, True) if tech.ppe_qualified else (False,)):
+                    key = (category, needs_ppe)
+                    self.pools.setdefault(key, [])
+                    self.memberships[tech.id].append(key)
+        for tech_id in self.technicians:
+            self._push(tech_id)
+
+    def _level(self, tech_id, category):
+        return self.technicians[tech_id].skills.get(category, 1) if category is not ANY_CATEGORY else 1
+
+    def _score(self, tech_id, category):
+        capacity = self.technicians[tech_id].capacity
+        # Charge ramenée en journées équivalentes à 8 h : les temps partiels se remplissent moins vite
+        return self.load[tech_id] * 8.0 / capacity - LEVEL_BONUS_HOURS * (self._level(tech_id, category) - 1)
+
+    def _push(self, tech_id):
+        version = self.version[tech_id]
+        for key in self.memberships[tech_id]:
+            heapq.heappush(self.pools[key], (self._score(tech_id, key[0]), tech_id, version))
+
+    def _beyond_horizon(self, date):
+        return self.horizon is not None and date > self.horizon
+
+    def _retire(self, tech_id):
+        # Plus aucune entrée valide : le technicien disparaît de tous ses pools
+        self.version[tech_id] += 1
+
+    def _best(self, key, duration):
+        """Renvoie (technicien, début, curseur) du meilleur candidat dont le créneau tient dans l'horizon."""
+        pool = self.pools.get(key)
+        skipped = []
+        found = None
+        while pool:
+            entry = heapq.heappop(pool)
+            tech_id, version = entry[1], entry[2]
+            if version != self.version[tech_id]:
+                continue  # Entrée périmée : la charge du technicien a changé
+            day, used = self.cursor[tech_id]
+            if self._beyond_horizon(day + timedelta(hours=WORKDAY_START_HOUR + used)):
+                self._retire(tech_id)
+                continue
+            begin, cursor = place((day, used), duration, self.technicians[tech_id].capacity)
+            if self._beyond_horizon(begin):
+                skipped.append(entry)  # Un ordre plus court peut encore tenir : l'entrée est remise
+                continue
+            found = (tech_id, begin, cursor)
+            break
+        for entry in skipped:
+            heapq.heappush(pool, entry)
+        return found
+
+    def assign(self, orders):
+        """Renvoie (affectations, ids des ordres sans technicien éligible)."""
+        ordered = sorted(orders, key=lambda o: (-int(o.priority or 0), not o.bio_hazard, o.id))
+        assignments, unassigned = [], []
+        for order in ordered:
+            duration = max(order.duration or 0.0, 0.0)
+            found = self._best((order.category or ANY_CATEGORY, bool(order.bio_hazard)), duration)
+            if found is None:
+                unassigned.append(order.id)
+                continue
+            tech_id, date, cursor = found
+            assignments.append(Assignment(order.id, tech_id, date))
+            self.cursor[tech_id] = cursor
+            self.load[tech_id] += duration
+            self.version[tech_id] += 1
+            self._push(tech_id)
+        return assignments, unassigned
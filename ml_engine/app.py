@@ -1,64 +1,374 @@
-from flask import Flask, request, jsonify
-import joblib
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify
+from werkzeug.exceptions import HTTPException
+import math
 import os
+import time
 
-app = Flask(__name__)
+import metrics
+import text_normalizer
+from feedback import FeedbackTrainer
+from metrics import stage
+from model_registry import BASE_DIR, ModelRegistry
+from prediction_cache import PredictionCache, analyzed_description, normalize_description
 
-# Charger le modèle au démarrage
-MODEL_PATH = 'biomed_classifier.joblib'
-VECTORIZER_PATH = 'tfidf_vectorizer.joblib'
+api = Blueprint('api', __name__)
+
+# Taille maximale d'un lot accepté par /predict_batch (imports historiques, re-triage)
+MAX_BATCH_SIZE = int(os.environ.get('ML_MAX_BATCH_SIZE', 1000))
+
+# Jeton requis pour les endpoints /admin (vide = pas de contrôle, réseau interne uniquement)
+ADMIN_TOKEN = os.environ.get('ML_ADMIN_TOKEN', '')
+
+# Cache des prédictions (0 entrée = cache désactivé)
+cache = PredictionCache(
+    max_entries=int(os.environ.get('ML_CACHE_MAX_ENTRIES', 10000)),
+    ttl=float(os.environ.get('ML_CACHE_TTL', 3600))
+)
+
+# Registre des modèles versionnés (models/CURRENT désigne la version servie)
+registry = ModelRegistry(
+    mmap_mode=os.environ.get('ML_MMAP_MODE', 'r'),
+    watch_interval=float(os.environ.get('ML_MODEL_WATCH_INTERVAL', 5)),
+    # Les prédictions de l'ancien modèle ne sont plus valables
+    on_swap=lambda bundle: cache.clear(),
+    model_format=os.environ.get('ML_MODEL_FORMAT', 'joblib')
+)
+
+# Apprentissage incrémental à partir des corrections des techniciens
+feedback_trainer = FeedbackTrainer(
+    min_batch=int(os.environ.get('ML_FEEDBACK_MIN_BATCH', 50))
+)
+
+# Profilage des requêtes lentes : une fraction ML_PROFILE_SAMPLE_RATE des requêtes est profilée,
+# le dump cProfile n'est gardé que si elle dépasse ML_PROFILE_SLOW_MS (0 = désactivé)
+profiler = metrics.SlowRequestProfiler(
+    threshold_ms=float(os.environ.get('ML_PROFILE_SLOW_MS', 0)),
+    sample_rate=float(os.environ.get('ML_PROFILE_SAMPLE_RATE', 0.01)),
+    output_dir=os.environ.get('ML_PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+)
+
+# Estimation durée (règles simplistes)
+DURATIONS = {
+    'Electronique': 3.0,
+    'Optique': 2.0,
+    'Software': 1.5,
+    'Hydraulique': 4.0
+}
+
+
+# Les ids Odoo sont des entiers PostgreSQL (int4) : au-delà, le régresseur de durée déborde
+MAX_PRODUCT_ID = 2 ** 31 - 1
+
+
+def parse_product_id(value):
+    """Identifiant d'équipement en int (ou None) ; ValueError si la valeur n'en est pas un."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, (int, str)):
+        value = int(value)
+    else:
+        raise ValueError(value)
+    if not -MAX_PRODUCT_ID - 1 <= value <= MAX_PRODUCT_ID:
+        raise ValueError(value)
+    return value
+
+
+def predict_descriptions(descriptions, product_ids=None):
+    # Référence locale : un rechargement à chaud pendant la requête ne la perturbe pas
+    bundle = registry.current
+    product_ids = product_ids or [None] * len(descriptions)
+    # Clé de cache : tokens analysés si le vectoriseur utilise text_normalizer,
+    # sinon la forme minuscule des modèles plus anciens
+    normalize = analyzed_description if text_normalizer.uses_normalizer(bundle.vectorizer) else normalize_description
+    with stage('normalize'):
+        # Le modèle d'équipement n'influence que le régresseur de durée
+        keys = [(bundle.version, normalize(d), p if bundle.duration_model else None)
+                for d, p in zip(descriptions, product_ids)]
+        results = [cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+    if missing:
+        # Vectorisation de tous les éléments absents du cache en une seule matrice creuse
+        # Texte brut : le vectoriseur applique lui-même sa normalisation (pas de double passage)
+        with stage('vectorize'):
+            features = bundle.vectorizer.transform([descriptions[i] for i in missing])
+
+        with stage('predict'):
+            # Un seul passage dans la forêt : la classe est l'argmax des probabilités
+            # (identique à model.predict, qui fait le même argmax en interne)
+            probas = bundle.model.predict_proba(features)
+            best = probas.argmax(axis=1)
+            categories = [str(c) for c in bundle.model.classes_[best]]
+
+            if bundle.duration_model is not None:
+                # Régresseur évalué sur la même matrice TF-IDF (pas de seconde vectorisation)
+                durations, lows, highs = bundle.duration_model.predict(
+                    features, categories, [product_ids[i] for i in missing])
+            else:
+                # Estimation durée (règles simplistes)
+                durations = [DURATIONS.get(category, 2.0) for category in categories]
+                lows = highs = None
+
+        for n, (i, row, idx) in enumerate(zip(missing, probas, best)):
+            results[i] = {
+                'category': categories[n],
+                'confidence': float(row[idx]),
+                'suggested_duration': round(float(durations[n]), 2),
+                'duration_interval': None if lows is None else [round(float(lows[n]), 2), round(float(highs[n]), 2)]
+            }
+            cache.put(keys[i], results[i])
+
+    metrics.record_predictions(results, cache_hits=len(results) - len(missing))
+    # Copie : l'appelant peut enrichir le résultat sans modifier le cache
+    return [dict(result) for result in results]
+
+
+def create_app():
+    # Fabrique WSGI : le modèle est chargé une seule fois par processus.
+    # Avec Gunicorn (preload_app), c'est le master qui le charge avant le fork,
+    # et les workers partagent ses pages mémoire en copy-on-write.
+    if registry.current is None and registry.activate() is None:
+        print("❌ ERREUR : Modèle non trouvé ! Exécutez train_model.py d'abord.")
+    app = Flask(__name__)
+    app.register_blueprint(api)
+    return app
+
+
+@api.before_app_request
+def start_model_watcher():
+    # Démarré dans chaque worker (après le fork) à sa première requête
+    registry.ensure_watcher()
+
+
+@api.before_app_request
+def start_request_metrics():
+    # Libellé = route déclarée (cardinalité bornée), pas l'URL brute
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.request_start = time.perf_counter()
+    g.profiler = profiler.start()
+
+
+@api.after_app_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    endpoint = g.get('metrics_endpoint', 'unmatched')
+    metrics.REQUESTS.labels(endpoint, str(response.status_code)).inc()
+    metrics.REQUEST_LATENCY.labels(endpoint).observe(elapsed)
+    if g.get('stage_timings'):
+        response.headers['Server-Timing'] = metrics.server_timing(g.stage_timings)
+    if g.get('profiler') is not None:
+        path = profiler.stop(g.profiler, elapsed, endpoint.strip('/').replace('/', '_'))
+        if path:
+            current_app.logger.warning(f"Requête lente ({elapsed * 1000:.0f} ms) profilée : {path}")
+    return response
+
+
+def error_response(message, status, error_type, **extra):
+    metrics.record_error(g.get('metrics_endpoint', 'unmatched'), error_type)
+    return jsonify(dict(extra, error=message)), status
 
-if os.path.exists(MODEL_PATH):
-    model = joblib.load(MODEL_PATH)
-    vectorizer = joblib.load(VECTORIZER_PATH)
-    print("✅ Modèle chargé avec succès")
-else:
-    print("❌ ERREUR : Modèle non trouvé ! Exécutez train_model.py d'abord.")
-    model = None
-    vectorizer = None
 
 # ENDPOINT DE PRÉDICTION
-@app.route('/predict', methods=['POST'])
+@api.route('/predict', methods=['POST'])
 def predict():
-    if model is None:
-        return jsonify({'error': 'Model not loaded'}), 500
+    if registry.current is None:
+        return error_response('Model not loaded', 500, 'model_not_loaded')
     
     try:
-        data = request.json
-        description = data.get('description', '').lower()
-        
-        if not description:
-            return jsonify({'error': 'Description vide'}), 400
-        
-        # Vectorisation
-        features = vectorizer.transform([description])
-        
-        # Prédiction
-        category = model.predict(features)[0]
-        probas = model.predict_proba(features)[0]
-        confidence = float(max(probas))
-        
-        # Estimation durée (règles simplistes)
-        durations = {
-            'Electronique': 3.0,
-            'Optique': 2.0,
-            'Software': 1.5,
-            'Hydraulique': 4.0
-        }
-        
-        return jsonify({
-            'category': category,
-            'confidence': confidence,
-            'suggested_duration': durations.get(category, 2.0)
-        })
+        with stage('parse'):
+            data = request.json
+            if not isinstance(data, dict):
+                return error_response("Le corps doit être un objet JSON", 400, 'invalid_payload')
+            description = data.get('description', '')
+
+        if not isinstance(description, str):
+            return error_response('Description invalide', 400, 'invalid_description')
+        if not description.strip():
+            return error_response('Description vide', 400, 'empty_description')
+        try:
+            product_id = parse_product_id(data.get('product_id'))
+        except ValueError:
+            return error_response("Le champ 'product_id' doit être un entier", 400, 'invalid_product_id')
+
+        result = predict_descriptions([description], [product_id])[0]
+        with stage('serialize'):
+            return jsonify(result)
     
+    except HTTPException as e:
+        # JSON illisible, mauvais Content-Type : erreur du client, pas du service
+        return error_response(e.description, e.code, type(e).__name__)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        current_app.logger.exception("Erreur sur /predict")
+        return error_response(str(e), 500, type(e).__name__)
+
+# ENDPOINT DE PRÉDICTION PAR LOT
+# Entrée  : {"descriptions": ["...", "...", ...],  (au plus MAX_BATCH_SIZE éléments)
+#            "product_ids": [12, null, ...]}       (optionnel, aligné sur descriptions)
+# Sortie  : {"results": [{"index": 0, "category": ..., "confidence": ..., "suggested_duration": ...,
+#                         "duration_interval": [bas, haut] ou null},
+#                        {"index": 1, "error": "Description vide"}, ...]}
+# Les résultats suivent l'ordre des entrées ; une entrée invalide ne fait pas échouer le lot.
+@api.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    if registry.current is None:
+        return error_response('Model not loaded', 500, 'model_not_loaded')
+
+    try:
+        with stage('parse'):
+            data = request.json or {}
+            descriptions = data.get('descriptions') if isinstance(data, dict) else None
+
+        if not isinstance(descriptions, list):
+            return error_response("Le champ 'descriptions' doit être une liste", 400, 'invalid_payload')
+        product_ids = data.get('product_ids') or [None] * len(descriptions)
+        if not isinstance(product_ids, list) or len(product_ids) != len(descriptions):
+            return error_response("Le champ 'product_ids' doit être aligné sur 'descriptions'", 400, 'invalid_payload')
+        if len(descriptions) > MAX_BATCH_SIZE:
+            return error_response(f'Lot trop volumineux ({len(descriptions)} > {MAX_BATCH_SIZE})', 413,
+                                  'batch_too_large', max_batch_size=MAX_BATCH_SIZE)
+
+        results = [None] * len(descriptions)
+        valid_indexes = []
+        valid_product_ids = []
+        for i, description in enumerate(descriptions):
+            if not isinstance(description, str):
+                results[i] = {'index': i, 'error': 'Description invalide'}
+                continue
+            if not description.strip():
+                results[i] = {'index': i, 'error': 'Description vide'}
+                continue
+            try:
+                valid_product_ids.append(parse_product_id(product_ids[i]))
+            except ValueError:
+                results[i] = {'index': i, 'error': "Identifiant d'équipement invalide"}
+                continue
+            valid_indexes.append(i)
+
+        if valid_indexes:
+            predictions = predict_descriptions([descriptions[i] for i in valid_indexes], valid_product_ids)
+            for i, prediction in zip(valid_indexes, predictions):
+                results[i] = dict(prediction, index=i)
+
+        invalid = len(descriptions) - len(valid_indexes)
+        if invalid:
+            metrics.record_error(g.metrics_endpoint, 'invalid_item', invalid)
+        with stage('serialize'):
+            return jsonify({'results': results})
+
+    except HTTPException as e:
+        # JSON illisible, mauvais Content-Type : erreur du client, pas du service
+        return error_response(e.description, e.code, type(e).__name__)
+    except Exception as e:
+        current_app.logger.exception("Erreur sur /predict_batch")
+        return error_response(str(e), 500, type(e).__name__)
 
 # ENDPOINT DE SANTÉ
-@app.route('/health', methods=['GET'])
+@api.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok', 'model_loaded': model is not None})
+    return jsonify({
+        'status': 'ok',
+        'model_loaded': registry.current is not None,
+        'model_version': registry.current.version if registry.current else None,
+        'max_batch_size': MAX_BATCH_SIZE,
+        'cache': cache.stats(),
+        'normalizer': (text_normalizer.NORMALIZER_VERSION
+                       if registry.current and text_normalizer.uses_normalizer(registry.current.vectorizer) else None),
+        'profiling': {
+            'enabled': profiler.enabled,
+            'slow_ms': profiler.threshold * 1000,
+            'sample_rate': profiler.sample_rate
+        }
+    })
+
+
+# ENDPOINT PROMETHEUS (latences par étape, erreurs, catégories, confiance)
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+def valid_feedback_item(item):
+    """Retour exploitable : description non vide, catégorie, durée numérique finie (ou null)."""
+    if not isinstance(item, dict):
+        return False
+    description, duration = item.get('description'), item.get('duration')
+    return (isinstance(description, str) and bool(description.strip())
+            and isinstance(item.get('category'), str)
+            and (duration is None or (isinstance(duration, (int, float)) and not isinstance(duration, bool)
+                                      and math.isfinite(duration))))
+
+
+# ENDPOINT DE FEEDBACK (ordres clôturés exportés par Odoo)
+# Entrée : {"items": [{"description": ..., "category": ..., "duration": ..., "product_id": ...,
+#                      "ml_category": ..., "corrected": true}, ...]}
+# Les retours sont mis en attente ; la mise à jour du modèle tourne en arrière-plan.
+@api.route('/feedback', methods=['POST'])
+def post_feedback():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': "Le corps doit être un objet JSON"}), 400
+    items = data.get('items')
+    if not isinstance(items, list):
+        return jsonify({'error': "Le champ 'items' doit être une liste"}), 400
+
+    valid = [item for item in items if valid_feedback_item(item)]
+    if valid:
+        feedback_trainer.append(valid)
+    return jsonify({
+        'accepted': len(valid),
+        'rejected': len(items) - len(valid),
+        'pending': feedback_trainer.pending_count(),
+        'update_started': feedback_trainer.trigger(force=bool(data.get('force_update')))
+    }), 202
+
+
+@api.route('/feedback', methods=['GET'])
+def feedback_status():
+    return jsonify({
+        'pending': feedback_trainer.pending_count(),
+        'min_batch': feedback_trainer.min_batch,
+        'reports': feedback_trainer.last_reports()
+    })
+
+
+# ENDPOINTS D'ADMINISTRATION DU MODÈLE
+def admin_forbidden():
+    return ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN
+
+
+@api.route('/admin/models', methods=['GET'])
+def list_models():
+    if admin_forbidden():
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({
+        'active': registry.active_version(),
+        'serving': registry.current.version if registry.current else None,
+        'versions': registry.versions()
+    })
+
+
+# Entrée : {"version": "20260117-093000"} (optionnel, défaut = version de models/CURRENT)
+# La version est promue dans CURRENT (les autres workers la rechargent via leur surveillance
+# du fichier) puis chargée en arrière-plan ici ; le modèle courant sert jusqu'à l'échange.
+@api.route('/admin/reload', methods=['POST'])
+def reload_model():
+    if admin_forbidden():
+        return jsonify({'error': 'Forbidden'}), 403
+    version = (request.get_json(silent=True) or {}).get('version')
+    try:
+        if version:
+            registry.promote(version)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    registry.activate_in_background(version)
+    return jsonify({'status': 'loading', 'version': version or registry.active_version()}), 202
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Serveur de développement uniquement : en production, voir gunicorn.conf.py
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,59 @@
+"""Régresseur de durée d'intervention (heures) entraîné sur les ordres clôturés.
+
+Les variables sont la matrice TF-IDF déjà calculée pour le classifieur (pas de
+seconde vectorisation), la catégorie (one-hot) et le modèle d'équipement
+(``product_id`` haché dans ``product_buckets`` colonnes). Un modèle linéaire
+(Ridge) sur log(1 + durée) garde le coût d'inférence négligeable devant la
+forêt. L'intervalle de prédiction vient des quantiles des résidus mesurés
+sur une réserve (méthode conforme « split »).
+"""
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import Ridge
+
+
+class DurationRegressor:
+
+    def __init__(self, categories, product_buckets=1024, alpha=1.0, coverage=0.8):
+        self.categories = list(categories)
+        self.product_buckets = product_buckets
+        self.coverage = coverage
+        self.model = Ridge(alpha=alpha)
+        self.residual_low = 0.0
+        self.residual_high = 0.0
+
+    def _features(self, X_text, categories, product_ids):
+        n = X_text.shape[0]
+        category_index = {c: i for i, c in enumerate(self.categories)}
+        rows = np.arange(n)
+
+        cat_cols = np.array([category_index.get(c, -1) for c in categories])
+        known = cat_cols >= 0
+        X_cat = sp.csr_matrix((np.ones(known.sum()), (rows[known], cat_cols[known])),
+                              shape=(n, len(self.categories)))
+
+        products = np.array([p if p else -1 for p in product_ids], dtype=np.int64)
+        has_product = products >= 0
+        X_product = sp.csr_matrix((np.ones(has_product.sum()),
+                                   (rows[has_product], products[has_product] % self.product_buckets)),
+                                  shape=(n, self.product_buckets))
+        return sp.hstack([X_text, X_cat, X_product], format='csr')
+
+    def fit(self, X_text, categories, product_ids, durations, X_cal=None, cal_categories=None,
+            cal_product_ids=None, cal_durations=None):
+        self.model.fit(self._features(X_text, categories, product_ids), np.log1p(durations))
+        if X_cal is not None and len(cal_durations):
+            # Résidus (espace log) sur la réserve -> bornes de l'intervalle
+            predicted = self.model.predict(self._features(X_cal, cal_categories, cal_product_ids))
+            residuals = np.log1p(cal_durations) - predicted
+            tail = (1 - self.coverage) / 2
+            self.residual_low, self.residual_high = np.quantile(residuals, [tail, 1 - tail])
+        return self
+
+    def predict(self, X_text, categories, product_ids):
+        """Renvoie (durée, borne basse, borne haute) en heures pour chaque ligne."""
+        log_pred = self.model.predict(self._features(X_text, categories, product_ids))
+        point = np.clip(np.expm1(log_pred), 0.0, None)
+        low = np.clip(np.expm1(log_pred + self.residual_low), 0.0, None)
+        high = np.clip(np.expm1(log_pred + self.residual_high), 0.0, None)
+        return point, low, high
@@ -0,0 +1,238 @@
+"""Apprentissage incrémental à partir des corrections des techniciens.
+
+Les retours reçus sur /feedback sont ajoutés à ``feedback/pending.jsonl``.
+Dès que ``min_batch`` retours sont en attente, un thread d'arrière-plan :
+
+1. prend le lot en attente (renommage atomique en ``inflight-*.jsonl``) ;
+2. met à jour une copie du modèle servi, sans ré-entraînement complet :
+   * Random Forest : ``warm_start`` ajoute ``trees_per_update`` arbres entraînés
+     sur le lot + un échantillon de rappel du corpus initial (toutes les classes
+     restent représentées), les arbres les plus anciens au-delà de ``max_trees``
+     sont retirés ;
+   * SGD (mode streaming) : ``partial_fit`` sur le lot ;
+3. compare l'accuracy avant/après sur une réserve du lot de retours (le corpus
+   initial a servi à entraîner le modèle servi : il fausserait la comparaison) ;
+4. publie la nouvelle version dans le registre si elle ne régresse pas
+   (les workers la rechargent à chaud via models/CURRENT) ;
+5. archive le lot traité en ``batch-*.jsonl`` (source de train_duration.py).
+
+Si la mise à jour échoue, le lot est remis dans ``pending.jsonl``. Un lot
+``inflight-*`` resté d'un worker arrêté en pleine mise à jour est remis en
+attente au passage suivant : aucun retour n'est perdu.
+
+Un verrou fichier garantit qu'une seule mise à jour tourne à la fois, même
+avec plusieurs workers Gunicorn.
+"""
+import copy
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from model_registry import BASE_DIR, REGISTRY_DIR, ModelRegistry
+
+FEEDBACK_DIR = os.environ.get('ML_FEEDBACK_DIR', os.path.join(REGISTRY_DIR, 'feedback'))
+REPLAY_CSV = os.environ.get('ML_REPLAY_CSV', os.path.join(BASE_DIR, 'training_data.csv'))
+
+
+class FeedbackTrainer:
+
+    def __init__(self, feedback_dir=FEEDBACK_DIR, replay_csv=REPLAY_CSV, min_batch=50,
+                 trees_per_update=10, max_trees=300, replay_rows=2000, holdout=0.2,
+                 max_accuracy_drop=0.02):
+        self.feedback_dir = feedback_dir
+        self.replay_csv = replay_csv
+        self.min_batch = min_batch
+        self.trees_per_update = trees_per_update
+        self.max_trees = max_trees
+        self.replay_rows = replay_rows
+        self.holdout = holdout
+        self.max_accuracy_drop = max_accuracy_drop
+        # Chargement complet (sans mmap) : le modèle est modifié puis republié
+        self.registry = ModelRegistry(mmap_mode=None)
+        self._thread = None
+
+    def _path(self, name):
+        return os.path.join(self.feedback_dir, name)
+
+    # ========== RÉCEPTION ==========
+    def append(self, items):
+        self._append_lines(''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items))
+
+    def _append_lines(self, lines):
+        os.makedirs(self.feedback_dir, exist_ok=True)
+        with open(self._path('pending.jsonl'), 'a', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(lines)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    def pending_count(self):
+        try:
+            with open(self._path('pending.jsonl'), encoding='utf-8') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def last_reports(self, limit=10):
+        try:
+            with open(self._path('history.jsonl'), encoding='utf-8') as f:
+                return [json.loads(line) for line in f.readlines()[-limit:]]
+        except FileNotFoundError:
+            return []
+
+    def trigger(self, force=False):
+        """Lance une mise à jour en arrière-plan si assez de retours sont en attente."""
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        if not force and self.pending_count() < self.min_batch:
+            return False
+        self._thread = threading.Thread(target=self.run_update, daemon=True)
+        self._thread.start()
+        return True
+
+    # ========== MISE À JOUR INCRÉMENTALE ==========
+    def run_update(self):
+        os.makedirs(self.feedback_dir, exist_ok=True)
+        with open(self._path('.lock'), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None  # Une mise à jour tourne déjà dans un autre worker
+            batch_path = None
+            try:
+                # Verrou tenu : un lot inflight-* restant vient d'un worker arrêté en cours de route
+                for orphan in sorted(glob.glob(self._path('inflight-*.jsonl'))):
+                    self._restore_batch(orphan)
+                batch_path = self._take_pending_batch()
+                if batch_path is None:
+                    return None
+                report = self._update_from_batch(batch_path)
+                # Lot traité : archivé pour train_duration.py
+                os.replace(batch_path, self._path(report['batch']))
+                with open(self._path('history.jsonl'), 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(report, ensure_ascii=False) + '\n')
+                print(f"🔁 Feedback : {report}")
+                return report
+            except Exception as e:
+                print(f"❌ ERREUR : mise à jour par feedback impossible : {e}")
+                if batch_path is not None and os.path.exists(batch_path):
+                    self._restore_batch(batch_path)
+                return None
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _take_pending_batch(self):
+        pending = self._path('pending.jsonl')
+        if not os.path.exists(pending):
+            return None
+        batch_path = self._path(f"inflight-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')}.jsonl")
+        # Les retours reçus pendant la mise à jour iront dans un nouveau pending.jsonl
+        os.replace(pending, batch_path)
+        return batch_path
+
+    def _restore_batch(self, batch_path):
+        """Remet un lot non traité dans pending.jsonl : il sera repris à la prochaine mise à jour."""
+        with open(batch_path, encoding='utf-8') as f:
+            lines = f.read()
+        if lines:
+            self._append_lines(lines if lines.endswith('\n') else lines + '\n')
+        os.remove(batch_path)
+
+    def _replay_sample(self):
+        import pandas as pd
+        if not os.path.exists(self.replay_csv):
+            return pd.DataFrame(columns=['description', 'category'])
+        df = pd.read_csv(self.replay_csv, usecols=['description', 'category'])
+        return df.sample(n=min(self.replay_rows, len(df)), random_state=int(time.time()))
+
+    def _update_from_batch(self, batch_path):
+        # pandas n'est importé qu'ici (thread de mise à jour) : pas de coût au démarrage du service
+        import pandas as pd
+        timings = {}
+        start = time.perf_counter()
+
+        bundle = self.registry.load()
+        if bundle is None:
+            raise RuntimeError("aucun modèle à mettre à jour")
+        classes = [str(c) for c in bundle.model.classes_]
+
+        # Nom d'archive du lot (inflight-* → batch-*)
+        batch_name = os.path.basename(batch_path).replace('inflight-', 'batch-', 1)
+        feedback = pd.read_json(batch_path, lines=True)
+        feedback = feedback[feedback['description'].astype(bool) & feedback['category'].isin(classes)]
+        if feedback.empty:
+            return {'batch': batch_name, 'rows': 0, 'skipped': 'aucun retour exploitable'}
+
+        # Réserve prise uniquement dans les retours : le modèle servi n'a jamais vu ces lignes.
+        # Le corpus de rappel sert seulement à l'entraînement (il a déjà servi à entraîner la forêt).
+        rng = np.random.default_rng()
+        is_test = rng.random(len(feedback)) < self.holdout
+        if not is_test.any() and len(feedback) > 1:
+            is_test[rng.integers(len(feedback))] = True
+        replay = self._replay_sample()
+
+        train = pd.concat([feedback[~is_test], replay])[['description', 'category']]
+        test = feedback[is_test][['description', 'category']]
+
+        t = time.perf_counter()
+        X_train = bundle.vectorizer.transform(train['description'])
+        X_test = bundle.vectorizer.transform(test['description'])
+        timings['vectorize_s'] = round(time.perf_counter() - t, 3)
+
+        t = time.perf_counter()
+        model = copy.deepcopy(bundle.model)
+        if hasattr(model, 'partial_fit'):
+            model.partial_fit(X_train, train['category'])
+            strategy = 'partial_fit'
+        else:
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + self.trees_per_update)
+            model.fit(X_train, train['category'])
+            if len(model.estimators_) > self.max_trees:
+                # Fenêtre glissante : on oublie les arbres les plus anciens
+                model.estimators_ = model.estimators_[-self.max_trees:]
+            model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+            strategy = 'warm_start'
+        timings['fit_s'] = round(time.perf_counter() - t, 3)
+
+        def accuracy(m, X, y):
+            return float(np.mean(m.predict(X) == y.to_numpy())) if len(y) else None
+
+        t = time.perf_counter()
+        before = accuracy(bundle.model, X_test, test['category'])
+        after = accuracy(model, X_test, test['category'])
+        timings['evaluate_s'] = round(time.perf_counter() - t, 3)
+
+        report = {
+            'batch': batch_name,
+            'base_version': bundle.version,
+            'strategy': strategy,
+            'rows': len(feedback),
+            'corrections': int(feedback.get('corrected', pd.Series(dtype=bool)).fillna(False).astype(bool).sum()),
+            'replay_rows': len(replay),
+            'test_rows': len(test),
+            'accuracy_before': before,
+            'accuracy_after': after,
+            'accuracy_delta': None if before is None else round(after - before, 4),
+            'timings': timings,
+        }
+
+        if before is not None and after < before - self.max_accuracy_drop:
+            report['published'] = None
+            report['skipped'] = 'régression de l\'accuracy'
+        else:
+            t = time.perf_counter()
+            # Le vectoriseur ne change pas : le régresseur de durée reste valable
+            report['published'] = self.registry.publish(model, bundle.vectorizer, duration_model=bundle.duration_model, metrics={
+                'accuracy': after,
+                'base_version': bundle.version,
+                'feedback_rows': len(feedback),
+                'accuracy_delta': report['accuracy_delta'],
+            })
+            timings['publish_s'] = round(time.perf_counter() - t, 3)
+        timings['total_s'] = round(time.perf_counter() - start, 3)
+        return report
@@ -1,9 +1,18 @@
+import argparse
+import itertools
+import os
+import time
+
+import numpy as np
 import pandas as pd
-import random
 
-# Number of examples to generate per category
+# Default number of examples to generate per category (2,000 rows in total)
 SAMPLES_PER_CATEGORY = 500
 
+# Rows are drawn in fixed blocks of this size, then re-cut to --chunksize:
+# the dataset depends on the seed only, not on the write chunking
+DRAW_BLOCK = 65_536
+
 # ---------------------------------------------------------
 # 1. VOCABULARY DEFINITION
 # We separate "Components" (Nouns) from "Issues" (Symptoms)
@@ -77,38 +86,132 @@ templates = [
 
 # ---------------------------------------------------------
 # 3. GENERATION ENGINE
+# Every possible sentence of a category is rendered ONCE into a lookup
+# table (original + lowercased "noisy" variant). Generating rows is then
+# pure NumPy index sampling into that table, block by block.
 # ---------------------------------------------------------
-data_rows = []
-
-for category, words in vocab.items():
-    for _ in range(SAMPLES_PER_CATEGORY):
-        # Pick random component and random issue from this category
-        comp = random.choice(words['components'])
-        issue = random.choice(words['issues'])
-        template = random.choice(templates)
-        
-        # Create the sentence
-        sentence = template.format(c=comp, i=issue)
-        
-        # Add a little noise (optional): Randomly lowercase sometimes
-        if random.random() > 0.5:
-            sentence = sentence.lower()
-            
-        data_rows.append({
-            'description': sentence,
-            'category': category
-        })
+def build_sentence_tables():
+    tables = {}
+    for category, words in vocab.items():
+        sentences = [
+            template.format(c=comp, i=issue)
+            for template, comp, issue in itertools.product(templates, words['components'], words['issues'])
+        ]
+        # Column 0 = original sentence, column 1 = lowercased (noise)
+        tables[category] = np.array([[s, s.lower()] for s in sentences], dtype=object)
+    return tables
+
+
+def parse_mix(mix):
+    categories = list(vocab)
+    if not mix:
+        return categories, np.full(len(categories), 1 / len(categories))
+    weights = dict.fromkeys(categories, 0.0)
+    for part in mix.split(','):
+        name, _, value = part.partition('=')
+        if name.strip() not in weights:
+            raise SystemExit(f"Unknown category in --mix: {name.strip()} (expected one of {categories})")
+        try:
+            weight = float(value)
+        except ValueError:
+            raise SystemExit(f"Invalid weight in --mix: {part.strip()!r} (expected Category=number)")
+        if not weight >= 0 or weight == float('inf'):
+            raise SystemExit(f"Invalid weight in --mix: {part.strip()!r} (must be a finite number >= 0)")
+        weights[name.strip()] = weight
+    total = sum(weights.values())
+    if total <= 0:
+        raise SystemExit("--mix needs at least one category with a weight > 0")
+    return categories, np.array([weights[c] / total for c in categories])
+
+
+def generate_blocks(rows, seed, mix, noise_rate):
+    rng = np.random.default_rng(seed)
+    tables = build_sentence_tables()
+    categories, probabilities = parse_mix(mix)
+    category_names = np.array(categories, dtype=object)
+
+    for start in range(0, rows, DRAW_BLOCK):
+        size = min(DRAW_BLOCK, rows - start)
+        category_idx = rng.choice(len(categories), size=size, p=probabilities)
+        noisy = (rng.random(size) < noise_rate).astype(np.intp)
+
+        descriptions = np.empty(size, dtype=object)
+        for k, category in enumerate(categories):
+            mask = category_idx == k
+            count = int(mask.sum())
+            if count:
+                table = tables[category]
+                descriptions[mask] = table[rng.integers(0, len(table), size=count), noisy[mask]]
+
+        # Rows are already i.i.d.: no global shuffle needed
+        yield pd.DataFrame({'description': descriptions, 'category': category_names[category_idx]})
+
+
+def generate_chunks(rows, seed, mix, noise_rate, chunksize):
+    """Re-cut the fixed draw blocks into chunks of ``chunksize`` rows for writing."""
+    pending, buffered = [], 0
+    for block in generate_blocks(rows, seed, mix, noise_rate):
+        pending.append(block)
+        buffered += len(block)
+        while buffered >= chunksize:
+            merged = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+            yield merged.iloc[:chunksize].reset_index(drop=True)
+            rest = merged.iloc[chunksize:]
+            pending, buffered = ([rest] if len(rest) else []), len(rest)
+    if buffered:
+        yield pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+
 
 # ---------------------------------------------------------
-# 4. SAVE
+# 4. SAVE (streamed chunk by chunk: constant memory)
 # ---------------------------------------------------------
-df = pd.DataFrame(data_rows)
+def write_dataset(chunks, output, fmt):
+    total = 0
+    writer = None
+    try:
+        for i, df in enumerate(chunks):
+            if fmt == 'parquet':
+                try:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                except ImportError:
+                    raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)")
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+            else:
+                df.to_csv(output, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding='utf-8')
+            if i == 0:
+                print(df.head(10))  # Show preview
+            total += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic maintenance ticket generator")
+    parser.add_argument('--rows', type=int, default=SAMPLES_PER_CATEGORY * len(vocab))
+    parser.add_argument('--seed', type=int, default=None, help="Same seed = same dataset (whatever --chunksize)")
+    parser.add_argument('--mix', default='', help="Category weights, e.g. Electronique=0.4,Optique=0.2,Software=0.2,Hydraulique=0.2")
+    parser.add_argument('--noise-rate', type=float, default=0.5, help="Share of rows written fully lowercase")
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--output', default='training_data.csv')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help="Default: from the output extension")
+    args = parser.parse_args()
+    if args.chunksize <= 0:
+        parser.error("--chunksize must be > 0")
+
+    fmt = args.format or ('parquet' if os.path.splitext(args.output)[1] == '.parquet' else 'csv')
+    start = time.perf_counter()
+    chunks = generate_chunks(args.rows, args.seed, args.mix, args.noise_rate, args.chunksize)
+    total = write_dataset(chunks, args.output, fmt)
+    elapsed = time.perf_counter() - start
 
-# Shuffle the dataset
-df = df.sample(frac=1).reset_index(drop=True)
+    print(f"\n✅ Generated {total} examples total in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s) -> {args.output}")
 
-print(df.head(10)) # Show preview
-print(f"\n✅ Generated {len(df)} examples total.")
-print(f"✅ Distribution:\n{df['category'].value_counts()}")
 
-df.to_csv('training_data.csv', index=False, encoding='utf-8')
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Configuration Gunicorn du ML Engine (production)
+# Lancement : gunicorn -c gunicorn.conf.py wsgi:application
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.environ.get('ML_BIND', '0.0.0.0:5000')
+
+# L'inférence Random Forest est liée au CPU : un worker par cœur, un thread par worker
+workers = int(os.environ.get('ML_WORKERS', multiprocessing.cpu_count()))
+threads = 1
+worker_class = 'sync'
+timeout = int(os.environ.get('ML_WORKER_TIMEOUT', 60))
+keepalive = 5
+
+# Recyclage périodique des workers (fuites mémoire éventuelles), décalé pour ne pas tous redémarrer ensemble
+max_requests = int(os.environ.get('ML_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+# Le modèle est chargé par le master (import de wsgi.py) AVANT le fork :
+# les tableaux numpy de la forêt sont partagés entre workers en copy-on-write
+preload_app = True
+
+# Pas de sur-souscription : chaque worker n'utilise qu'un thread BLAS/OpenMP
+# (défini ici, avant que le preload n'importe numpy)
+for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, '1')
+
+# Métriques Prometheus partagées entre workers (un fichier mmap par processus,
+# agrégés par /metrics) ; défini avant que le preload n'importe prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ml_engine_metrics'))
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+# Les fichiers d'un démarrage précédent fausseraient les compteurs
+for path in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+    os.remove(path)
+
+accesslog = os.environ.get('ML_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('ML_LOG_LEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    # Les objets déjà chargés (modèle, vocabulaire) passent dans la génération
+    # permanente : le GC des workers ne les parcourt plus et ne salit donc pas
+    # leurs pages partagées (sinon chaque collecte les recopierait).
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
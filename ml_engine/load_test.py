@@ -0,0 +1,155 @@
+"""Test de charge du ML Engine : latence p50/p95/p99 et débit (req/s).
+
+Deux modes :
+  - contre un serveur déjà lancé :
+        python load_test.py --url http://localhost:5000 --concurrency 8
+  - en lançant Gunicorn pour chaque nombre de workers :
+        python load_test.py --workers 1,2,4,8 --concurrency 16
+
+Seule la bibliothèque standard est utilisée (urllib + threads).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SAMPLE_DESCRIPTIONS = [
+    "L'écran est tout noir",
+    "Il y a une fuite d'huile importante au niveau de la pompe",
+    "Le système est lent depuis la dernière mise à jour",
+    "La lentille de l'objectif est rayée et l'image est floue",
+    "Le condensateur de la carte mère a grillé",
+    "Le logiciel affiche un écran bleu au démarrage",
+    "Le vérin hydraulique perd de la pression",
+    "Le capteur ne fait plus le point",
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def post_json(url, payload, timeout=10):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def run_load(base_url, concurrency, duration, unique):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            description = rng.choice(SAMPLE_DESCRIPTIONS)
+            if unique:
+                # Suffixe unique : contourne le cache de prédiction pour mesurer le modèle
+                description = f"{description} {rng.getrandbits(48):x}"
+            start = time.perf_counter()
+            try:
+                post_json(f'{base_url}/predict', {'description': description})
+                local.append(time.perf_counter() - start)
+            except (urllib.error.URLError, OSError):
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'{base_url}/health', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    return False
+
+
+def start_gunicorn(workers, port):
+    env = dict(os.environ, ML_WORKERS=str(workers), ML_BIND=f'127.0.0.1:{port}',
+               ML_LOG_LEVEL='warning', ML_ACCESS_LOG='')
+    here = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:application'],
+        cwd=here, env=env
+    )
+
+
+def print_row(label, stats):
+    print(f"{label:>8} | {stats['requests']:>8} | {stats['errors']:>6} | {stats['rps']:>8.1f} | "
+          f"{stats['p50_ms']:>8.2f} | {stats['p95_ms']:>8.2f} | {stats['p99_ms']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Serveur existant (ex: http://localhost:5000)")
+    parser.add_argument('--workers', default='1,2,4', help="Nombres de workers Gunicorn à tester (sans --url)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Clients simultanés")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée de chaque palier (s)")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--unique', action='store_true', help="Descriptions uniques (sans effet de cache)")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} | {'requêtes':>8} | {'err':>6} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    print("-" * 72)
+
+    if args.url:
+        print_row('-', run_load(args.url.rstrip('/'), args.concurrency, args.duration, args.unique))
+        return
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    for workers in [int(w) for w in args.workers.split(',')]:
+        server = start_gunicorn(workers, args.port)
+        try:
+            if server.poll() is not None or not wait_ready(base_url):
+                print(f"❌ Gunicorn ({workers} workers) n'a pas démarré")
+                continue
+            # Échauffement : premières requêtes hors mesure
+            run_load(base_url, args.concurrency, 1.0, args.unique)
+            print_row(str(workers), run_load(base_url, args.concurrency, args.duration, args.unique))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Instrumentation du ML Engine : métriques Prometheus, chronomètres par étape, profilage.
+
+* ``stage(name)`` chronomètre une étape du traitement (parse, normalize,
+  vectorize, predict, serialize). La durée alimente l'histogramme
+  ``ml_stage_duration_seconds`` et l'en-tête ``Server-Timing`` de la réponse.
+* ``render()`` produit le texte exposé sur /metrics. Sous Gunicorn,
+  ``PROMETHEUS_MULTIPROC_DIR`` (défini dans gunicorn.conf.py) agrège les
+  compteurs de tous les workers.
+* ``SlowRequestProfiler`` profile (cProfile) une fraction des requêtes et
+  ne garde le dump que si la requête a dépassé le seuil de lenteur.
+"""
+import cProfile
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import g, has_request_context
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+# Latences attendues : de quelques dizaines de µs (étape) à quelques secondes (gros lot)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter('ml_requests_total', "Requêtes HTTP traitées", ['endpoint', 'status'])
+REQUEST_LATENCY = Histogram('ml_request_duration_seconds', "Durée totale des requêtes HTTP",
+                            ['endpoint'], buckets=LATENCY_BUCKETS)
+STAGE_LATENCY = Histogram('ml_stage_duration_seconds', "Durée de chaque étape du traitement",
+                          ['endpoint', 'stage'], buckets=LATENCY_BUCKETS)
+ERRORS = Counter('ml_errors_total', "Erreurs par type", ['endpoint', 'type'])
+PREDICTIONS = Counter('ml_predictions_total', "Prédictions renvoyées par catégorie", ['category'])
+CONFIDENCE = Histogram('ml_prediction_confidence', "Distribution de la confiance des prédictions",
+                       buckets=(0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0))
+CACHE_LOOKUPS = Counter('ml_cache_lookups_total', "Consultations du cache de prédictions", ['result'])
+
+
+def _endpoint():
+    return g.get('metrics_endpoint', 'other') if has_request_context() else 'internal'
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(_endpoint(), name).observe(elapsed)
+        if has_request_context():
+            timings = g.setdefault('stage_timings', {})
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def record_error(endpoint, error_type, count=1):
+    ERRORS.labels(endpoint, error_type).inc(count)
+
+
+def record_predictions(results, cache_hits):
+    for result in results:
+        PREDICTIONS.labels(result['category']).inc()
+        CONFIDENCE.observe(result['confidence'])
+    CACHE_LOOKUPS.labels('hit').inc(cache_hits)
+    CACHE_LOOKUPS.labels('miss').inc(len(results) - cache_hits)
+
+
+def server_timing(timings):
+    """Valeur de l'en-tête Server-Timing (durées en ms, visibles dans les devtools)."""
+    return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.items())
+
+
+def render():
+    """Renvoie (corps, content-type) de /metrics."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class SlowRequestProfiler:
+    """Profilage échantillonné : dump cProfile des requêtes plus lentes que ``threshold_ms``."""
+
+    def __init__(self, threshold_ms=0, sample_rate=0.01, output_dir='profiles'):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+
+    @property
+    def enabled(self):
+        return self.threshold > 0 and self.sample_rate > 0
+
+    def start(self):
+        """Renvoie un profileur actif pour une requête tirée au sort, sinon None."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def stop(self, profiler, elapsed, label):
+        profiler.disable()
+        if elapsed < self.threshold:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(self.output_dir, f'{stamp}-{label}-{elapsed * 1000:.0f}ms-{os.getpid()}.prof')
+        # Lecture : python -m pstats <fichier>  (ou snakeviz)
+        profiler.dump_stats(path)
+        return path
@@ -0,0 +1,240 @@
+"""Registre versionné des artefacts du modèle (classifieur + vectoriseur).
+
+Structure sur disque :
+
+    models/
+        CURRENT                        <- nom de la version active
+        20260117-093000/
+            manifest.json              <- version, date, fichiers, métriques
+            biomed_classifier.joblib
+            tfidf_vectorizer.joblib
+            duration_regressor.joblib  <- optionnel (train_duration.py)
+            biomed_model.npz           <- export NumPy (Random Forest + TF-IDF), voir npz_model.py
+
+Si le registre est vide, les artefacts historiques à la racine de
+ml_engine/ sont chargés comme version « legacy-<empreinte> ».
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import joblib
+
+import npz_model
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.environ.get('ML_MODEL_REGISTRY', os.path.join(BASE_DIR, 'models'))
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+MODEL_FILE = 'biomed_classifier.joblib'
+VECTORIZER_FILE = 'tfidf_vectorizer.joblib'
+DURATION_FILE = 'duration_regressor.joblib'
+NPZ_FILE = 'biomed_model.npz'
+
+
+class ModelBundle:
+    """Artefacts d'une version chargée. Immuable : un échange de modèle
+    remplace l'objet entier, les requêtes en cours gardent l'ancien."""
+
+    def __init__(self, version, model, vectorizer, manifest, duration_model=None):
+        self.version = version
+        self.model = model
+        self.vectorizer = vectorizer
+        self.manifest = manifest
+        # Régresseur de durée, lié au vectoriseur de la même version (None = règles fixes)
+        self.duration_model = duration_model
+
+
+def file_digest(*paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+
+    def __init__(self, root=REGISTRY_DIR, legacy_dir=BASE_DIR, mmap_mode='r', watch_interval=0, on_swap=None,
+                 model_format='joblib'):
+        self.root = root
+        self.legacy_dir = legacy_dir
+        # mmap_mode='r' : les tableaux numpy restés tels quels après dépickling
+        # sont projetés en mémoire depuis le fichier (partagés, chargés à la demande)
+        self.mmap_mode = mmap_mode or None
+        # 'npz' : inférence NumPy pure (démarrage rapide, scikit-learn jamais importé)
+        self.model_format = model_format
+        self.watch_interval = watch_interval
+        self.on_swap = on_swap
+        self.current = None
+        self._lock = threading.Lock()
+        self._watcher_pid = None
+        self._watched_mtime = None
+
+    # ========== LECTURE DU REGISTRE ==========
+    def _current_path(self):
+        return os.path.join(self.root, CURRENT_FILE)
+
+    def active_version(self):
+        try:
+            with open(self._current_path(), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name, MANIFEST_FILE)
+            if os.path.isfile(path):
+                with open(path, encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    # ========== CHARGEMENT ==========
+    def load(self, version=None):
+        version = version or self.active_version()
+        if version:
+            directory = os.path.join(self.root, version)
+            with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+                manifest = json.load(f)
+        else:
+            directory = self.legacy_dir
+            if not os.path.exists(os.path.join(directory, MODEL_FILE)):
+                return None
+            version = 'legacy-' + file_digest(os.path.join(directory, MODEL_FILE),
+                                              os.path.join(directory, VECTORIZER_FILE))
+            manifest = {'version': version, 'legacy': True}
+
+        npz_path = os.path.join(directory, NPZ_FILE)
+        if self.model_format == 'npz':
+            if os.path.exists(npz_path):
+                model, vectorizer, duration_model = npz_model.load_npz(npz_path)
+                return ModelBundle(version, model, vectorizer, manifest, duration_model)
+            print(f"⚠️  Pas d'export {NPZ_FILE} pour la version {version} : chargement joblib")
+
+        model = joblib.load(os.path.join(directory, MODEL_FILE), mmap_mode=self.mmap_mode)
+        vectorizer = joblib.load(os.path.join(directory, VECTORIZER_FILE), mmap_mode=self.mmap_mode)
+        duration_path = os.path.join(directory, DURATION_FILE)
+        duration_model = joblib.load(duration_path) if os.path.exists(duration_path) else None
+        return ModelBundle(version, model, vectorizer, manifest, duration_model)
+
+    def activate(self, version=None):
+        """Charge une version puis l'échange atomiquement avec la version servie."""
+        with self._lock:
+            bundle = self.load(version)
+            if bundle is None:
+                return None
+            # Une simple affectation : les requêtes en cours terminent avec l'ancien bundle
+            self.current = bundle
+            if self.on_swap:
+                self.on_swap(bundle)
+            print(f"✅ Modèle chargé avec succès (version {bundle.version})")
+            return bundle
+
+    def activate_in_background(self, version=None):
+        thread = threading.Thread(target=self.activate, args=(version,), daemon=True)
+        thread.start()
+        return thread
+
+    # ========== PUBLICATION ==========
+    def promote(self, version):
+        """Désigne la version active (écriture atomique de CURRENT)."""
+        if not os.path.isfile(os.path.join(self.root, version, MANIFEST_FILE)):
+            raise ValueError(f"Version inconnue : {version}")
+        tmp_path = self._current_path() + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, self._current_path())
+
+    def publish(self, model, vectorizer, metrics=None, version=None, promote=True, duration_model=None):
+        """Écrit une nouvelle version dans le registre et renvoie son nom."""
+        version = version or datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        directory = os.path.join(self.root, version)
+        tmp_directory = directory + '.tmp'
+        os.makedirs(tmp_directory)
+
+        # Non compressé : condition nécessaire pour charger avec mmap_mode
+        joblib.dump(model, os.path.join(tmp_directory, MODEL_FILE))
+        joblib.dump(vectorizer, os.path.join(tmp_directory, VECTORIZER_FILE))
+        files = [MODEL_FILE, VECTORIZER_FILE]
+        if duration_model is not None:
+            joblib.dump(duration_model, os.path.join(tmp_directory, DURATION_FILE))
+            files.append(DURATION_FILE)
+        try:
+            npz_model.export_npz(os.path.join(tmp_directory, NPZ_FILE), model, vectorizer, duration_model)
+            files.append(NPZ_FILE)
+        except ValueError as e:
+            # Modèle streaming (Hashing + SGD) : servi uniquement au format joblib
+            print(f"ℹ️  Export {NPZ_FILE} ignoré : {e}")
+        manifest = {
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'files': {name: file_digest(os.path.join(tmp_directory, name)) for name in files},
+            'classes': [str(c) for c in getattr(model, 'classes_', [])],
+            'metrics': metrics or {},
+        }
+        with open(os.path.join(tmp_directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        # Le dossier n'apparaît complet qu'une fois tous les fichiers écrits
+        os.replace(tmp_directory, directory)
+
+        if promote:
+            self.promote(version)
+        return version
+
+    # ========== SURVEILLANCE DE CURRENT (rechargement à chaud) ==========
+    def ensure_watcher(self):
+        # Un thread par processus : les threads ne survivent pas au fork des workers Gunicorn
+        if not self.watch_interval or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        self._watched_mtime = self._current_mtime()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self._current_path()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_interval)
+            mtime = self._current_mtime()
+            if mtime == self._watched_mtime:
+                continue
+            self._watched_mtime = mtime
+            version = self.active_version()
+            if version and (self.current is None or self.current.version != version):
+                try:
+                    self.activate(version)
+                except Exception as e:
+                    print(f"❌ ERREUR : rechargement de la version {version} impossible : {e}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gestion du registre de modèles")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Lister les versions")
+    promote_parser = subparsers.add_parser('promote', help="Activer une version")
+    promote_parser.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == 'list':
+        active = registry.active_version()
+        for manifest in registry.versions():
+            marker = '*' if manifest['version'] == active else ' '
+            print(f"{marker} {manifest['version']}  {manifest.get('created_at', '')}  {manifest.get('metrics', {})}")
+    else:
+        registry.promote(args.version)
+        print(f"✅ Version {args.version} activée")
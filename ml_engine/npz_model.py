@@ -0,0 +1,237 @@
+"""Format d'inférence léger : TF-IDF + Random Forest en tableaux NumPy.
+
+``export_npz`` aplatit le vectoriseur (vocabulaire, IDF, stop words) et les
+arbres de la forêt (nœuds de tous les arbres concaténés) dans un seul
+fichier ``.npz`` non compressé. ``load_npz`` le relit en quelques
+millisecondes et renvoie des objets qui imitent l'API scikit-learn utilisée
+par app.py (``transform``, ``predict_proba``, ``classes_``), sans importer
+scikit-learn ni joblib.
+
+Les calculs reproduisent ceux de scikit-learn dans le même ordre
+(normalisation L2 séquentielle, seuils comparés en float32, probabilités
+des arbres cumulées une à une) : prédictions et probabilités sont
+identiques au modèle joblib (voir test_npz_parity.py).
+"""
+import re
+
+import numpy as np
+
+import text_normalizer
+
+FORMAT_VERSION = 1
+
+
+# ========== EXPORT (appelé avec les objets scikit-learn) ==========
+def _check_exportable(model, vectorizer):
+    if not hasattr(model, 'estimators_') or not hasattr(model.estimators_[0], 'tree_'):
+        raise ValueError(f"modèle non exportable : {type(model).__name__} (Random Forest attendue)")
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("modèle multi-sorties non exportable")
+    if not hasattr(vectorizer, 'vocabulary_') or not hasattr(vectorizer, 'idf_'):
+        raise ValueError(f"vectoriseur non exportable : {type(vectorizer).__name__} (TF-IDF attendu)")
+    # Analyse scikit-learn par défaut, ou text_normalizer (fold + tokenize) rejoué à l'identique
+    normalized = text_normalizer.uses_normalizer(vectorizer)
+    unsupported = {
+        'analyzer': (vectorizer.analyzer, 'word'),
+        'preprocessor': (vectorizer.preprocessor, text_normalizer.fold if normalized else None),
+        'tokenizer': (vectorizer.tokenizer, text_normalizer.tokenize if normalized else None),
+        'strip_accents': (vectorizer.strip_accents, None),
+        'norm': (vectorizer.norm, 'l2'),
+        'sublinear_tf': (vectorizer.sublinear_tf, False),
+        'binary': (vectorizer.binary, False),
+    }
+    for name, (value, expected) in unsupported.items():
+        if value != expected:
+            raise ValueError(f"vectoriseur non exportable : {name}={value!r}")
+
+
+def export_npz(path, model, vectorizer, duration_model=None):
+    """Écrit le classifieur (et le régresseur de durée s'il existe) dans ``path``."""
+    _check_exportable(model, vectorizer)
+    normalized = text_normalizer.uses_normalizer(vectorizer)
+
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    arrays = {
+        'format_version': np.array(FORMAT_VERSION),
+        'terms': np.array(terms),
+        'idf': vectorizer.idf_.astype(np.float64),
+        'stop_words': np.array(sorted(vectorizer.get_stop_words() or [])),
+        'token_pattern': np.array(vectorizer.token_pattern or ''),
+        'lowercase': np.array(vectorizer.lowercase),
+        'ngram_range': np.array(vectorizer.ngram_range),
+        # Vide : analyse scikit-learn (token_pattern) ; sinon version de text_normalizer
+        'normalizer': np.array(text_normalizer.NORMALIZER_VERSION if normalized else ''),
+        'classes': np.array([str(c) for c in model.classes_]),
+    }
+
+    # Forêt aplatie : les indices d'enfants deviennent globaux, une feuille pointe sur elle-même
+    n_classes = len(model.classes_)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        own = np.arange(tree.node_count) + offset
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+        rights.append(np.where(is_leaf, own, tree.children_right + offset))
+        # Même normalisation que DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        offset += tree.node_count
+
+    arrays.update(
+        tree_roots=np.array(roots, dtype=np.int64),
+        node_feature=np.concatenate(features).astype(np.int32),
+        node_threshold=np.concatenate(thresholds).astype(np.float64),
+        node_left=np.concatenate(lefts).astype(np.int64),
+        node_right=np.concatenate(rights).astype(np.int64),
+        node_value=np.concatenate(values),
+    )
+
+    if duration_model is not None:
+        arrays.update(
+            duration_coef=duration_model.model.coef_.astype(np.float64),
+            duration_intercept=np.array(float(duration_model.model.intercept_)),
+            duration_categories=np.array(duration_model.categories),
+            duration_product_buckets=np.array(duration_model.product_buckets),
+            duration_residuals=np.array([duration_model.residual_low, duration_model.residual_high]),
+        )
+
+    # Non compressé : np.load ne fait qu'une lecture, sans décompression
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+# ========== INFÉRENCE (NumPy seul) ==========
+class NpzVectorizer:
+    """Équivalent de TfidfVectorizer.transform ; renvoie une matrice dense float64."""
+
+    def __init__(self, data):
+        self.vocabulary_ = {term: i for i, term in enumerate(data['terms'].tolist())}
+        self.idf_ = data['idf']
+        self.stop_words = frozenset(data['stop_words'].tolist())
+        self.lowercase = bool(data['lowercase'])
+        self.min_n, self.max_n = (int(n) for n in data['ngram_range'])
+        # Exports antérieurs au normaliseur : pas de clé 'normalizer'
+        normalizer = str(data['normalizer']) if 'normalizer' in data else ''
+        if normalizer and normalizer != text_normalizer.NORMALIZER_VERSION:
+            raise ValueError(f"normaliseur {normalizer} requis, {text_normalizer.NORMALIZER_VERSION} disponible")
+        # Même attribut que TfidfVectorizer : text_normalizer.uses_normalizer() fonctionne sur les deux
+        self.tokenizer = text_normalizer.tokenize if normalizer else None
+        self.token_pattern = None if normalizer else re.compile(str(data['token_pattern']))
+
+    def _terms(self, doc):
+        if self.tokenizer is not None:
+            tokens = self.tokenizer(text_normalizer.fold(doc))
+        else:
+            if self.lowercase:
+                doc = doc.lower()
+            tokens = [t for t in self.token_pattern.findall(doc) if t not in self.stop_words]
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                yield ' '.join(tokens[i:i + n])
+
+    def transform(self, docs):
+        X = np.zeros((len(docs), len(self.idf_)), dtype=np.float64)
+        vocabulary = self.vocabulary_
+        for row, doc in enumerate(docs):
+            for term in self._terms(doc):
+                column = vocabulary.get(term)
+                if column is not None:
+                    X[row, column] += 1.0
+        X *= self.idf_
+        # Somme cumulée : même ordre d'addition que la normalisation L2 de scikit-learn
+        norms = np.sqrt(np.add.accumulate(X * X, axis=1)[:, -1])
+        norms[norms == 0.0] = 1.0
+        X /= norms[:, np.newaxis]
+        return X
+
+
+class NpzForest:
+    """Équivalent de RandomForestClassifier.predict_proba / predict."""
+
+    def __init__(self, data):
+        self.classes_ = data['classes']
+        self.roots = data['tree_roots']
+        self.feature = data['node_feature']
+        self.threshold = data['node_threshold']
+        self.left = data['node_left']
+        self.right = data['node_right']
+        self.value = data['node_value']
+
+    def _leaves(self, X):
+        """Indice de la feuille atteinte, tableau (arbres, échantillons)."""
+        # Les arbres de scikit-learn comparent les variables en float32
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_trees = X.shape[0], len(self.roots)
+        samples = np.tile(np.arange(n_samples), n_trees)
+        nodes = np.repeat(self.roots, n_samples)
+        # Tous les chemins (arbre, échantillon) avancent d'un niveau à la fois ;
+        # ceux arrivés sur une feuille sortent de l'ensemble actif
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        while active.size:
+            current = nodes[active]
+            go_left = X[samples[active], self.feature[current]] <= self.threshold[current]
+            following = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = following
+            active = active[self.left[following] != following]
+        return nodes.reshape(n_trees, n_samples)
+
+    def apply(self, X):
+        """Indice de la feuille atteinte, par échantillon et par arbre."""
+        return self._leaves(X).T
+
+    def predict_proba(self, X):
+        leaves = self._leaves(X)
+        proba = np.zeros((leaves.shape[1], len(self.classes_)), dtype=np.float64)
+        # Cumul arbre par arbre, comme RandomForestClassifier (ordre des additions préservé)
+        for tree_leaves in leaves:
+            proba += self.value[tree_leaves]
+        proba /= leaves.shape[0]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class NpzDurationModel:
+    """Équivalent de DurationRegressor.predict (duration_model.py)."""
+
+    def __init__(self, data):
+        self.categories = data['duration_categories'].tolist()
+        self.product_buckets = int(data['duration_product_buckets'])
+        self.coef = data['duration_coef']
+        self.intercept = float(data['duration_intercept'])
+        self.residual_low, self.residual_high = data['duration_residuals'].tolist()
+
+    def predict(self, X_text, categories, product_ids):
+        """Renvoie (durée, borne basse, borne haute) en heures pour chaque ligne."""
+        n_text = X_text.shape[1]
+        coef_category = self.coef[n_text:n_text + len(self.categories)]
+        coef_product = self.coef[n_text + len(self.categories):]
+        category_index = {c: i for i, c in enumerate(self.categories)}
+
+        log_pred = X_text @ self.coef[:n_text] + self.intercept
+        for i, (category, product_id) in enumerate(zip(categories, product_ids)):
+            if category in category_index:
+                log_pred[i] += coef_category[category_index[category]]
+            if product_id and product_id >= 0:
+                log_pred[i] += coef_product[product_id % self.product_buckets]
+        point = np.clip(np.expm1(log_pred), 0.0, None)
+        low = np.clip(np.expm1(log_pred + self.residual_low), 0.0, None)
+        high = np.clip(np.expm1(log_pred + self.residual_high), 0.0, None)
+        return point, low, high
+
+
+def load_npz(path):
+    """Renvoie (modèle, vectoriseur, régresseur de durée ou None)."""
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['format_version']) != FORMAT_VERSION:
+            raise ValueError(f"format npz non supporté : {int(data['format_version'])}")
+        duration_model = NpzDurationModel(data) if 'duration_coef' in data else None
+        return NpzForest(data), NpzVectorizer(data), duration_model
@@ -0,0 +1,86 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import text_normalizer
+
+# Tout ce qui n'est pas un caractère de mot (ponctuation, espaces multiples)
+NON_WORD = re.compile(r'\W+')
+
+
+def normalize_description(description):
+    # Minuscules + ponctuation/espaces réduits à un seul espace.
+    # Le TfidfVectorizer ne retient que les tokens \w\w+ en minuscules :
+    # deux descriptions de même forme normalisée ont donc la même prédiction.
+    return NON_WORD.sub(' ', description.lower()).strip()
+
+
+def analyzed_description(description):
+    # Vectoriseur entraîné avec text_normalizer : la suite de tokens détermine seule
+    # les features, donc « Fumée ! » et « fumee » partagent la même entrée du cache
+    return ' '.join(text_normalizer.analyze(description))
+
+
+class PredictionCache:
+    """Cache LRU borné (nombre d'entrées + TTL) des prédictions du modèle."""
+
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,57 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from model_registry import NPZ_FILE, ModelRegistry
+from npz_model import NpzForest
+
+# 1. Charger la version active dans les deux formats
+reference = ModelRegistry(model_format='joblib').load()
+light = ModelRegistry(model_format='npz').load()
+if not isinstance(light.model, NpzForest):
+    sys.exit(f"❌ Pas d'export {NPZ_FILE} pour la version {reference.version} : relancez train_model.py")
+print(f"📦 Version : {reference.version}")
+
+# 2. Corpus : tout le jeu d'entraînement + les phrases pièges de test_prediction.py
+descriptions = pd.read_csv('training_data.csv')['description'].tolist() + [
+    "L'écran est tout noir",
+    "Il y a une fuite d'huile importante",
+    "Le système est lent",
+    "Ça fait un bruit bizarre",
+    "FUMEE NOIRE sur l’alimentation, câbles brûlés",
+    "La souris ne clique plus",
+    "",
+    "!!! ???",
+]
+
+# 3. Comparaison vectorisation, probabilités et classes
+X_ref = reference.vectorizer.transform(descriptions)
+X_light = light.vectorizer.transform(descriptions)
+proba_ref = reference.model.predict_proba(X_ref)
+proba_light = light.model.predict_proba(X_light)
+pred_ref = reference.model.predict(X_ref)
+pred_light = light.model.predict(X_light)
+
+print("🔍 PARITÉ joblib / npz :")
+print("-" * 30)
+print(f"Descriptions         : {len(descriptions)}")
+print(f"Écart TF-IDF max     : {np.abs(X_ref.toarray() - X_light).max():.3g}")
+print(f"Écart probas max     : {np.abs(proba_ref - proba_light).max():.3g}")
+print(f"Prédictions égales   : {int((pred_ref == pred_light).sum())}/{len(descriptions)}")
+
+identical = np.array_equal(proba_ref, proba_light) and np.array_equal(pred_ref, pred_light)
+
+# 4. Régresseur de durée (si la version en a un)
+if reference.duration_model is not None:
+    categories = [str(c) for c in pred_ref]
+    product_ids = [i % 40 or None for i in range(len(descriptions))]
+    duration_ref = reference.duration_model.predict(X_ref, categories, product_ids)
+    duration_light = light.duration_model.predict(X_light, categories, product_ids)
+    gap = max(np.abs(a - b).max() for a, b in zip(duration_ref, duration_light))
+    print(f"Écart durée max (h)  : {gap:.3g}")
+    identical = identical and gap < 1e-9
+
+if not identical:
+    sys.exit("❌ Le modèle npz ne reproduit pas le modèle joblib")
+print("\n✅ Prédictions et probabilités identiques")
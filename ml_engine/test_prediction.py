@@ -1,8 +1,10 @@
-import joblib
+from model_registry import ModelRegistry
 
-# 1. Charger le cerveau (le modèle et le vectoriseur)
-model = joblib.load('biomed_classifier.joblib')
-vectorizer = joblib.load('tfidf_vectorizer.joblib')
+# 1. Charger le cerveau (le modèle et le vectoriseur de la version active)
+bundle = ModelRegistry().load()
+model = bundle.model
+vectorizer = bundle.vectorizer
+print(f"📦 Version : {bundle.version}")
 
 # 2. Phrases pièges (Ambiguës ou nouvelles)
 nouveaux_tickets = [
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Normalisation du texte des descriptions, commune au triage Regex et au ML.
+
+Un seul traitement pour l'entraînement (train_model.py), le service
+(app.py, npz_model.py) et le moteur de règles d'Odoo (tools/safety_rules.py) :
+
+* ``fold`` : minuscules + suppression des accents (décomposition Unicode
+  NFKD, marques combinantes retirées) + ligatures (œ → oe). « Fumée »,
+  « FUMEE » et « fumee » donnent tous ``fumee``. Les lettres non latines
+  sont conservées (seuls les diacritiques sont retirés).
+* ``tokenize`` : mots de 2 caractères ou plus (même motif que scikit-learn),
+  sans les mots vides français, réduits par une racinisation légère
+  (pluriel, féminin, participe passé, infinitif en -er).
+* ``analyze`` = ``tokenize(fold(texte))``.
+
+Les résultats de ``stem`` et de ``tokenize`` sont mis en cache (LRU) : un
+même ticket ou un même mot n'est analysé qu'une fois par processus.
+
+Module sans dépendance (bibliothèque standard). Le fichier existe en deux
+exemplaires identiques, un par conteneur : ``ml_engine/text_normalizer.py``
+et ``extra-addons/biomed_maintenance/tools/text_normalizer.py``.
+``benchmarks/bench_text_normalizer.py`` échoue s'ils divergent.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Change si le résultat de l'analyse change : les vectoriseurs entraînés
+# avec une autre version doivent être ré-entraînés
+NORMALIZER_VERSION = 'fr-1'
+
+# Ligatures et signes que NFKD ne décompose pas
+_TRANSLATION = str.maketrans({
+    'œ': 'oe', 'Œ': 'oe', 'æ': 'ae', 'Æ': 'ae', 'ß': 'ss',
+    '’': "'", '‘': "'", 'ʼ': "'", '‐': '-', '‑': '-', '–': '-',
+})
+_COMBINING = re.compile(r'[\u0300-\u036f]+')  # Diacritiques combinants (après NFKD)
+
+# Même motif de mots que le TfidfVectorizer de scikit-learn par défaut
+TOKEN_PATTERN = re.compile(r'\b\w\w+\b')
+
+# Mots vides français, sous forme repliée (sans accents).
+# Les négations (ne, pas, plus, jamais, aucun, sans) sont gardées :
+# « ne charge pas » et « charge » ne décrivent pas la même panne.
+FRENCH_STOP_WORDS = frozenset("""
+    au aux avec ce ces cet cette ceci cela ca dans de des du elle elles en et
+    est etait etre eu il ils je la le les leur leurs lui ma mais me meme mes
+    moi mon nos notre nous on ou par pour qu que qui sa se ses si son sont sur
+    ta te tes toi ton tu un une vos votre vous ete avoir ai as avons avez ont
+    fait faire tres trop tout tous toute toutes alors aussi donc car depuis
+    ici lors puis quand comme entre vers chez apres avant encore deja
+""".split())
+
+MIN_STEM = 4  # Une racine ne descend jamais sous 4 lettres (panne → pann, pas pan)
+
+
+def strip_accents(text):
+    """Retire accents et ligatures sans changer la casse."""
+    if text.isascii():
+        return text
+    return _COMBINING.sub('', unicodedata.normalize('NFKD', text.translate(_TRANSLATION)))
+
+
+def _build_latin1_table():
+    """Table octet → octet équivalente à ``strip_accents(c.lower())`` pour chaque caractère Latin-1.
+
+    Renvoie aussi les remplacements à faire avant l'encodage : ligatures et
+    caractères dont la forme repliée sort de Latin-1 (µ → μ, ½ → 1⁄2).
+    """
+    table = bytearray(range(256))
+    replacements = [(chr(code), replacement) for code, replacement in _TRANSLATION.items()]
+    for code in range(256):
+        char = chr(code)
+        if code in _TRANSLATION:
+            continue
+        folded = strip_accents(char.lower())
+        if len(folded) == 1 and ord(folded) < 256:
+            table[code] = ord(folded)
+        else:
+            replacements.append((char, folded))
+    return bytes(table), tuple(replacements)
+
+
+_LATIN1_TABLE, _REPLACEMENTS = _build_latin1_table()
+
+
+def fold(text):
+    """Forme canonique d'un texte : minuscules, sans accents ni ligatures.
+
+    Le français tient presque toujours en Latin-1 (une fois œ et l'apostrophe
+    typographique remplacés) : minuscules et accents sont alors traités en un
+    seul ``bytes.translate``. Les autres écritures passent par NFKD.
+    """
+    if text.isascii():  # Cas courant (saisie sans accents) : aucune décomposition Unicode
+        return text.lower()
+    for char, replacement in _REPLACEMENTS:
+        if char in text:
+            text = text.replace(char, replacement)
+    try:
+        raw = text.encode('latin-1')
+    except UnicodeEncodeError:
+        return strip_accents(text.lower())
+    return raw.translate(_LATIN1_TABLE).decode('latin-1')
+
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """Racinisation légère d'un mot replié (bloqué, bloquée, bloqués, bloquer → bloqu)."""
+    if len(token) <= MIN_STEM or not token.isalpha():
+        return token
+    if token.endswith('aux'):
+        token = token[:-3] + 'al'  # canaux → canal
+    elif token[-1] in 'sx':
+        token = token[:-1]
+    if token.endswith('er') and len(token) > MIN_STEM:
+        token = token[:-1]
+    while token[-1] == 'e' and len(token) > MIN_STEM:
+        token = token[:-1]
+    if token[-1] == token[-2] and len(token) > MIN_STEM:
+        token = token[:-1]  # Consonne doublée du féminin : cassee → cass
+    return token
+
+
+@lru_cache(maxsize=16384)
+def tokenize(folded):
+    """Tokens d'un texte déjà replié par ``fold`` (tuple, partagé par le cache)."""
+    return tuple(stem(t) for t in TOKEN_PATTERN.findall(folded) if t not in FRENCH_STOP_WORDS)
+
+
+def analyze(text):
+    return tokenize(fold(text))
+
+
+def vectorizer_params():
+    """Paramètres à passer à TfidfVectorizer / HashingVectorizer pour utiliser ce module."""
+    return {'preprocessor': fold, 'tokenizer': tokenize, 'lowercase': False, 'token_pattern': None}
+
+
+def uses_normalizer(vectorizer):
+    return getattr(vectorizer, 'tokenizer', None) is tokenize
+
+
+def cache_info():
+    return {'stem': stem.cache_info()._asdict(), 'tokenize': tokenize.cache_info()._asdict()}
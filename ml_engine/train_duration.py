@@ -0,0 +1,102 @@
+"""Entraînement du régresseur de durée à partir des ordres clôturés.
+
+Source par défaut : les lots exportés par Odoo vers /feedback
+(models/feedback/batch-*.jsonl : description, category, duration, product_id).
+Un export CSV/JSONL avec les mêmes colonnes peut être passé avec --input.
+
+Le régresseur utilise le vectoriseur de la version active : une nouvelle
+version (même classifieur + même vectoriseur + régresseur) est publiée.
+
+Usage : python train_duration.py [--input ordres_clotures.csv]
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+from duration_model import DurationRegressor
+from feedback import FEEDBACK_DIR
+from model_registry import ModelRegistry
+
+MIN_ROWS = 50
+
+
+def load_closed_orders(path):
+    if path:
+        paths = [path]
+    else:
+        paths = sorted(glob.glob(os.path.join(FEEDBACK_DIR, 'batch-*.jsonl')))
+    frames = []
+    for p in paths:
+        if p.endswith('.jsonl'):
+            frames.append(pd.read_json(p, lines=True))
+        else:
+            frames.append(pd.read_csv(p))
+    if not frames:
+        return pd.DataFrame(columns=['description', 'category', 'duration', 'product_id'])
+    df = pd.concat(frames, ignore_index=True)
+    if 'product_id' not in df:
+        df['product_id'] = None
+    # Lots accumulés depuis le début : une valeur non numérique est ignorée, pas fatale
+    df['duration'] = pd.to_numeric(df['duration'], errors='coerce')
+    df['product_id'] = pd.to_numeric(df['product_id'], errors='coerce')
+    df = df.dropna(subset=['description', 'category', 'duration'])
+    return df[df['duration'] > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', help="CSV/JSONL d'ordres clôturés (défaut : lots de feedback)")
+    parser.add_argument('--coverage', type=float, default=0.8, help="Couverture de l'intervalle de prédiction")
+    parser.add_argument('--alpha', type=float, default=1.0)
+    args = parser.parse_args()
+
+    start_time = time.time()
+    df = load_closed_orders(args.input)
+    if len(df) < MIN_ROWS:
+        raise SystemExit(f"❌ Pas assez d'ordres clôturés avec durée ({len(df)} < {MIN_ROWS})")
+
+    registry = ModelRegistry(mmap_mode=None)
+    bundle = registry.load()
+    if bundle is None:
+        raise SystemExit("❌ ERREUR : Modèle non trouvé ! Exécutez train_model.py d'abord.")
+
+    # Découpage train / calibration (intervalle) / test
+    rng = np.random.default_rng(42)
+    split = rng.random(len(df))
+    train, cal, test = df[split < 0.6], df[(split >= 0.6) & (split < 0.8)], df[split >= 0.8]
+
+    def matrix(part):
+        return bundle.vectorizer.transform(part['description'])
+
+    def columns(part):
+        return list(part['category']), [int(p) if pd.notna(p) else None for p in part['product_id']]
+
+    print(f"⏱️  {len(df)} ordres clôturés ({len(train)} entraînement / {len(cal)} calibration / {len(test)} test)")
+    regressor = DurationRegressor(bundle.model.classes_, alpha=args.alpha, coverage=args.coverage)
+    regressor.fit(matrix(train), *columns(train), train['duration'].to_numpy(),
+                  matrix(cal), *columns(cal), cal['duration'].to_numpy())
+
+    point, low, high = regressor.predict(matrix(test), *columns(test))
+    actual = test['duration'].to_numpy()
+    mae = mean_absolute_error(actual, point)
+    covered = float(np.mean((actual >= low) & (actual <= high)))
+    print(f"✅ MAE : {mae:.2f} h — couverture de l'intervalle : {covered:.0%} (cible {args.coverage:.0%})")
+
+    version = registry.publish(bundle.model, bundle.vectorizer, duration_model=regressor, metrics=dict(
+        bundle.manifest.get('metrics', {}),
+        base_version=bundle.version,
+        duration_mae=round(mae, 3),
+        duration_interval_coverage=round(covered, 3),
+        duration_rows=len(df)
+    ))
+    print(f"📦 Version publiée : {version}")
+    print(f"✅ Terminé en {time.time() - start_time:.2f} secondes.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,58 +1,186 @@
+import argparse
+import os
+import resource
+import time
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
-import joblib
-import time
 
-print("🚀 Démarrage de l'entraînement optimisé...")
-start_time = time.time()
-
-# 1. CHARGEMENT
-df = pd.read_csv('training_data.csv')
-X = df['description']
-y = df['category']
-
-# 2. SPLIT
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-# 3. VECTORISATION (LE SECRET EST ICI)
-# max_features=1000 (au lieu de 100) : Le modèle connaît 10x plus de mots
-# min_df=2 : Ignore les mots qui n'apparaissent qu'une seule fois (fautes de frappe, bruit)
-print("🔠 Vectorisation...")
-vectorizer = TfidfVectorizer(
-    max_features=1000,      # <--- Augmenté de 100 à 1000
-    ngram_range=(1, 2),     # Garde les paires de mots ("écran bleu")
-    min_df=2,               # <--- Ignore les mots trop rares
-    stop_words='english'    # (Optionnel) ou une liste de stop words français
-)
-X_train_vec = vectorizer.fit_transform(X_train)
-X_test_vec = vectorizer.transform(X_test)
-
-# 4. ENTRAÎNEMENT
-print("🌲 Entraînement du modèle...")
-model = RandomForestClassifier(
-    n_estimators=100,       # <--- 100 arbres pour plus de stabilité
-    random_state=42,
-    verbose=0               # <--- 0 pour ne pas polluer le terminal
-)
-model.fit(X_train_vec, y_train)
-
-# 5. ÉVALUATION DÉTAILLÉE
-print("\n📊 Résultats :")
-accuracy = model.score(X_test_vec, y_test)
-print(f"✅ Accuracy Globale: {accuracy:.2%}")
-
-# Affiche les détails par catégorie pour voir où le modèle se trompe
-print("\n🔍 Rapport détaillé :")
-y_pred = model.predict(X_test_vec)
-print(classification_report(y_test, y_pred))
-
-# 6. SAUVEGARDE
-joblib.dump(model, 'biomed_classifier.joblib')
-joblib.dump(vectorizer, 'tfidf_vectorizer.joblib')
-
-print(f"✅ Terminé en {time.time() - start_time:.2f} secondes.")
\ No newline at end of file
+import text_normalizer
+from model_registry import NPZ_FILE, ModelRegistry
+
+CATEGORIES = ['Electronique', 'Hydraulique', 'Optique', 'Software']
+
+
+def peak_rss_mb():
+    # ru_maxrss est en Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def stage(name, timings):
+    print(f"⏱️  {name}...")
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    timings[name] = {'seconds': round(elapsed, 3), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+    print(f"   {name} : {elapsed:.2f} s (pic RSS {peak_rss_mb():.0f} Mo)")
+
+
+# ---------------------------------------------------------
+# MODE EN MÉMOIRE (TF-IDF + Random Forest) : petit corpus
+# ---------------------------------------------------------
+def train_in_memory(args, timings):
+    # 1. CHARGEMENT
+    with stage('chargement', timings):
+        df = pd.read_csv(args.csv)
+        X = df['description']
+        y = df['category']
+
+    # 2. SPLIT
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # 3. VECTORISATION (LE SECRET EST ICI)
+    # max_features=1000 (au lieu de 100) : Le modèle connaît 10x plus de mots
+    # min_df=2 : Ignore les mots qui n'apparaissent qu'une seule fois (fautes de frappe, bruit)
+    # Texte normalisé par text_normalizer (accents, mots vides français, racines) :
+    # « Fumée »/« fumee » ou « bloqué »/« bloquées » ne prennent qu'une seule colonne
+    with stage('vectorisation', timings):
+        vectorizer = TfidfVectorizer(
+            max_features=1000,      # <--- Augmenté de 100 à 1000
+            ngram_range=(1, 2),     # Garde les paires de mots ("écran bleu")
+            min_df=2,               # <--- Ignore les mots trop rares
+            **text_normalizer.vectorizer_params()
+        )
+        X_train_vec = vectorizer.fit_transform(X_train)
+        X_test_vec = vectorizer.transform(X_test)
+
+    # 4. ENTRAÎNEMENT
+    with stage('entraînement', timings):
+        model = RandomForestClassifier(
+            n_estimators=100,       # <--- 100 arbres pour plus de stabilité
+            random_state=42,
+            n_jobs=args.n_jobs,     # <--- Arbres entraînés en parallèle sur tous les cœurs
+            verbose=0               # <--- 0 pour ne pas polluer le terminal
+        )
+        model.fit(X_train_vec, y_train)
+        # L'inférence reste mono-thread : une requête ne doit pas occuper tous les cœurs du worker
+        model.set_params(n_jobs=None)
+
+    # 5. ÉVALUATION DÉTAILLÉE
+    with stage('évaluation', timings):
+        y_pred = model.predict(X_test_vec)
+        accuracy = float(np.mean(y_pred == y_test.to_numpy()))
+    print(f"✅ Accuracy Globale: {accuracy:.2%}")
+
+    # Affiche les détails par catégorie pour voir où le modèle se trompe
+    print("\n🔍 Rapport détaillé :")
+    print(classification_report(y_test, y_pred))
+
+    return model, vectorizer, accuracy, len(X_train)
+
+
+# ---------------------------------------------------------
+# MODE STREAMING (Hashing + SGD incrémental) : gros corpus
+# Mémoire constante : le CSV est lu par morceaux, le vectoriseur n'a pas
+# de vocabulaire à construire et le modèle apprend avec partial_fit.
+# ---------------------------------------------------------
+def train_streaming(args, timings):
+    vectorizer = HashingVectorizer(
+        n_features=args.n_features,
+        ngram_range=(1, 2),     # Mêmes paires de mots que le mode TF-IDF
+        alternate_sign=False,
+        norm='l2',
+        **text_normalizer.vectorizer_params()
+    )
+    model = SGDClassifier(
+        loss='log_loss',        # <--- Nécessaire pour predict_proba (confiance côté API)
+        alpha=1e-6,
+        random_state=42
+    )
+
+    # Une ligne sur test_every sert à l'évaluation (plafonnée pour rester en mémoire constante)
+    test_every = max(2, int(round(1 / args.test_size)))
+    X_test, y_test = [], []
+    train_rows = 0
+    chunk_index = 0
+
+    with stage('lecture + vectorisation + entraînement (streaming)', timings):
+        for chunk in pd.read_csv(args.csv, chunksize=args.chunksize, usecols=['description', 'category']):
+            chunk = chunk.dropna()
+            is_test = (np.arange(train_rows, train_rows + len(chunk)) % test_every) == 0
+            test_chunk = chunk[is_test]
+            train_chunk = chunk[~is_test]
+
+            room = args.max_test_rows - len(X_test)
+            if room > 0:
+                X_test.extend(test_chunk['description'].iloc[:room])
+                y_test.extend(test_chunk['category'].iloc[:room])
+
+            model.partial_fit(vectorizer.transform(train_chunk['description']),
+                              train_chunk['category'], classes=CATEGORIES)
+            train_rows += len(train_chunk)
+            chunk_index += 1
+            print(f"   morceau {chunk_index} : {train_rows} lignes apprises (pic RSS {peak_rss_mb():.0f} Mo)")
+
+    with stage('évaluation', timings):
+        y_pred = model.predict(vectorizer.transform(X_test))
+        accuracy = float(np.mean(y_pred == np.asarray(y_test)))
+    print(f"✅ Accuracy Globale: {accuracy:.2%} ({len(y_test)} lignes de test)")
+    print("\n🔍 Rapport détaillé :")
+    print(classification_report(y_test, y_pred))
+
+    return model, vectorizer, accuracy, train_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement du classifieur de pannes")
+    parser.add_argument('--csv', default='training_data.csv')
+    parser.add_argument('--stream', action='store_true',
+                        help="Lecture par morceaux + HashingVectorizer + SGD (corpus de plusieurs millions de lignes)")
+    parser.add_argument('--chunksize', type=int, default=100000, help="Lignes par morceau (mode streaming)")
+    parser.add_argument('--n-features', type=int, default=2 ** 18, help="Taille de l'espace haché (mode streaming)")
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--max-test-rows', type=int, default=200000, help="Plafond du jeu de test (mode streaming)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Cœurs pour la Random Forest (-1 = tous)")
+    args = parser.parse_args()
+
+    print("🚀 Démarrage de l'entraînement optimisé...")
+    start_time = time.time()
+    timings = {}
+
+    if args.stream:
+        model, vectorizer, accuracy, train_rows = train_streaming(args, timings)
+    else:
+        model, vectorizer, accuracy, train_rows = train_in_memory(args, timings)
+
+    # 6. SAUVEGARDE (registre versionné : models/<version>/ puis models/CURRENT)
+    # Les ML Engines en cours d'exécution détectent CURRENT et rechargent à chaud
+    # La publication écrit aussi l'export NumPy (biomed_model.npz) lu avec ML_MODEL_FORMAT=npz
+    registry = ModelRegistry()
+    with stage('sauvegarde + export npz', timings):
+        version = registry.publish(model, vectorizer, metrics={
+            'accuracy': round(accuracy, 4),
+            'train_rows': train_rows,
+            'mode': 'stream' if args.stream else 'memory',
+            'normalizer': text_normalizer.NORMALIZER_VERSION,
+            'timings': timings
+        })
+    print(f"📦 Version publiée : {version}")
+    npz_path = os.path.join(registry.root, version, NPZ_FILE)
+    if os.path.exists(npz_path):
+        print(f"📦 Export NumPy : {npz_path} ({os.path.getsize(npz_path) / 1e6:.1f} Mo)")
+
+    print(f"✅ Terminé en {time.time() - start_time:.2f} secondes (pic RSS {peak_rss_mb():.0f} Mo).")
+
+
+if __name__ == '__main__':
+    main()
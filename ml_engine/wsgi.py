@@ -0,0 +1,4 @@
+# Point d'entrée WSGI de production : gunicorn -c gunicorn.conf.py wsgi:application
+from app import create_app
+
+application = create_app()